@@ -1,23 +1,70 @@
+import asyncio
 import logging
 import time
+import weakref
+from typing import Optional
+
 import requests
 
+from http_pool import get_session
+
+try:
+    import aiohttp
+    HAS_AIOHTTP = True
+except ImportError:
+    HAS_AIOHTTP = False
+
 logger = logging.getLogger(__name__)
 
+# 积分任务列表中的每日签到任务
+SIGN_IN_TASK_NAME = "每日签到"
+# 任务状态：奖励已领取
+TASK_STATUS_CLAIMED = 2
+
 
 class RainyunAPIError(Exception):
     """雨云 API 异常"""
     pass
 
 
+def _parse_result(result: dict) -> dict:
+    """检查业务状态码并返回 data 字段"""
+    api_code = result.get("code")
+    api_message = result.get("message", "未知错误")
+    
+    if api_code != 200:
+        logger.error(f"   API 返回错误 [{api_code}]: {api_message}")
+        raise RainyunAPIError(f"API 错误 [{api_code}]: {api_message}")
+    
+    logger.info(f"   ✓ API 请求成功")
+    return result.get("data", {})
+
+
+def _parse_sign_in_status(tasks) -> Optional[bool]:
+    """从积分任务列表判断今日是否已签到，找不到签到任务时返回 None"""
+    for task in tasks or []:
+        if isinstance(task, dict) and task.get("Name") == SIGN_IN_TASK_NAME:
+            status = task.get("Status")
+            logger.info(f"   每日签到任务状态: {status}")
+            return status == TASK_STATUS_CLAIMED
+    logger.warning("   任务列表中未找到每日签到任务")
+    return None
+
+
 class RainyunAPI:
-    """雨云 API 客户端"""
+    """
+    雨云 API 客户端
+    
+    使用 API Key 认证；未配置 API Key 时可传入已保存会话的 Cookie，
+    以网页登录态调用只读接口（如签到状态查询）
+    """
     
-    def __init__(self, api_key: str, config: dict):
-        if not api_key:
+    def __init__(self, api_key: str, config: dict, cookies: Optional[dict] = None):
+        if not api_key and not cookies:
             raise ValueError("API Key 不能为空")
         
         self.api_key = api_key
+        self.cookies = cookies
         self.config = config
         self.base_url = config.get("api_base_url", "https://api.v2.rainyun.com")
         self.timeout = config.get("api_request_timeout", 10)
@@ -25,10 +72,12 @@ class RainyunAPI:
         self.retry_delay = config.get("api_retry_delay", 2)
         
         self.headers = {
-            "x-api-key": api_key,
             "Content-Type": "application/json",
             "User-Agent": "Rainyun-QingLong-Script/2.0"
         }
+        if api_key:
+            self.headers["x-api-key"] = api_key
+        self.session = get_session(config.get("http_pool_size", 16))
         
         logger.info("🔑 API 客户端初始化成功")
     
@@ -42,9 +91,9 @@ class RainyunAPI:
         for attempt in range(1, self.max_retries + 1):
             try:
                 if method.upper() == "GET":
-                    response = requests.get(url, headers=self.headers, timeout=self.timeout)
+                    response = self.session.get(url, headers=self.headers, cookies=self.cookies, timeout=self.timeout)
                 else:
-                    response = requests.post(url, headers=self.headers, json=data, timeout=self.timeout)
+                    response = self.session.post(url, headers=self.headers, cookies=self.cookies, json=data, timeout=self.timeout)
                 
                 # 解析 JSON
                 try:
@@ -53,16 +102,7 @@ class RainyunAPI:
                     response.raise_for_status()
                     raise RainyunAPIError(f"响应不是有效 JSON: {response.text[:200]}")
                 
-                # 检查业务状态码
-                api_code = result.get("code")
-                api_message = result.get("message", "未知错误")
-                
-                if api_code != 200:
-                    logger.error(f"   API 返回错误 [{api_code}]: {api_message}")
-                    raise RainyunAPIError(f"API 错误 [{api_code}]: {api_message}")
-                
-                logger.info(f"   ✓ API 请求成功")
-                return result.get("data", {})
+                return _parse_result(result)
                 
             except requests.RequestException as e:
                 last_error = e
@@ -81,6 +121,15 @@ class RainyunAPI:
         logger.info(f"   当前积分: {points}")
         return points
     
+    def get_reward_tasks(self) -> list:
+        """获取积分任务列表"""
+        data = self._request("GET", "/user/reward/tasks")
+        return data if isinstance(data, list) else []
+    
+    def is_signed_in_today(self) -> Optional[bool]:
+        """今日是否已领取签到奖励，无法判断时返回 None"""
+        return _parse_sign_in_status(self.get_reward_tasks())
+    
     def get_server_list(self, product_type: str = "rgs") -> list:
         """获取服务器 ID 列表"""
         data = self._request("GET", f"/product/id_list?product_type={product_type}")
@@ -110,3 +159,122 @@ class RainyunAPI:
             return True
         except RainyunAPIError:
             return False
+
+
+# 每个事件循环共享一个 aiohttp 会话
+_async_sessions = weakref.WeakKeyDictionary()
+
+
+def _get_async_session(pool_size: int) -> "aiohttp.ClientSession":
+    """获取当前事件循环共享的 aiohttp 会话"""
+    loop = asyncio.get_running_loop()
+    session = _async_sessions.get(loop)
+    if session is None or session.closed:
+        connector = aiohttp.TCPConnector(limit=pool_size)
+        session = aiohttp.ClientSession(connector=connector)
+        _async_sessions[loop] = session
+    return session
+
+
+async def close_async_session():
+    """关闭当前事件循环的 aiohttp 会话"""
+    session = _async_sessions.pop(asyncio.get_running_loop(), None)
+    if session is not None and not session.closed:
+        await session.close()
+
+
+class AsyncRainyunAPI(RainyunAPI):
+    """
+    雨云 API 异步客户端（需安装 aiohttp）
+    
+    方法与 RainyunAPI 一致，可在同一事件循环中并发处理多个账号：
+        apis = [AsyncRainyunAPI(key, config) for key in api_keys]
+        points = await asyncio.gather(*(api.get_user_points() for api in apis))
+        await close_async_session()
+    """
+    
+    def __init__(self, api_key: str, config: dict, cookies: Optional[dict] = None):
+        if not HAS_AIOHTTP:
+            raise RainyunAPIError("异步客户端需要 aiohttp，请执行: pip3 install aiohttp")
+        super().__init__(api_key, config, cookies)
+        self.pool_size = config.get("http_pool_size", 16)
+    
+    async def _request(self, method: str, endpoint: str, data: dict = None) -> dict:
+        """发送 API 请求（带重试机制）"""
+        url = f"{self.base_url}{endpoint}"
+        last_error = None
+        session = _get_async_session(self.pool_size)
+        timeout = aiohttp.ClientTimeout(total=self.timeout)
+        
+        logger.info(f"📡 API 请求: {method} {endpoint}")
+        
+        for attempt in range(1, self.max_retries + 1):
+            try:
+                async with session.request(
+                    method.upper(), url, headers=self.headers, cookies=self.cookies, json=data, timeout=timeout
+                ) as response:
+                    # 解析 JSON
+                    try:
+                        result = await response.json(content_type=None)
+                    except ValueError:
+                        response.raise_for_status()
+                        text = await response.text()
+                        raise RainyunAPIError(f"响应不是有效 JSON: {text[:200]}")
+                
+                return _parse_result(result)
+                
+            except (aiohttp.ClientError, asyncio.TimeoutError) as e:
+                last_error = e
+                if attempt < self.max_retries:
+                    logger.warning(f"   请求失败 (第 {attempt} 次): {e}，{self.retry_delay}秒后重试...")
+                    await asyncio.sleep(self.retry_delay)
+                continue
+        
+        logger.error(f"   网络请求失败 (已重试 {self.max_retries} 次): {last_error}")
+        raise RainyunAPIError(f"网络请求失败: {last_error}")
+    
+    async def get_user_points(self) -> int:
+        """获取用户积分余额"""
+        data = await self._request("GET", "/user/")
+        points = data.get("Points", 0)
+        logger.info(f"   当前积分: {points}")
+        return points
+    
+    async def get_reward_tasks(self) -> list:
+        """获取积分任务列表"""
+        data = await self._request("GET", "/user/reward/tasks")
+        return data if isinstance(data, list) else []
+    
+    async def is_signed_in_today(self) -> Optional[bool]:
+        """今日是否已领取签到奖励，无法判断时返回 None"""
+        return _parse_sign_in_status(await self.get_reward_tasks())
+    
+    async def get_server_list(self, product_type: str = "rgs") -> list:
+        """获取服务器 ID 列表"""
+        data = await self._request("GET", f"/product/id_list?product_type={product_type}")
+        server_ids = data.get(product_type, [])
+        logger.info(f"   找到 {len(server_ids)} 台{product_type}服务器")
+        return server_ids
+    
+    async def get_server_detail(self, server_id: int) -> dict:
+        """获取服务器详细信息"""
+        logger.info(f"   查询服务器 {server_id} 详情...")
+        return await self._request("GET", f"/product/rgs/{server_id}/")
+    
+    async def renew_server(self, server_id: int, days: int = 7) -> dict:
+        """使用积分续费服务器"""
+        data = {
+            "duration_day": days,
+            "product_id": server_id,
+            "product_type": "rgs"
+        }
+        logger.info(f"   正在续费服务器 {server_id}（{days} 天）...")
+        return await self._request("POST", "/product/point_renew", data)
+    
+    async def test_connection(self) -> bool:
+        """测试 API 连接"""
+        try:
+            await self.get_user_points()
+            return True
+        except RainyunAPIError:
+            return False
@@ -0,0 +1,173 @@
+import logging
+import threading
+from typing import Callable, List, Optional
+
+logger = logging.getLogger(__name__)
+
+# 回退模式下需要清理存储的站点
+CLEAR_ORIGINS = ("https://app.rainyun.com", "https://www.rainyun.com", "https://api.v2.rainyun.com")
+
+
+class BrowserLease:
+    """单个账号租用的浏览器（独立上下文中的标签页）"""
+    
+    def __init__(self, driver, context_id: Optional[str] = None, target_id: Optional[str] = None):
+        self.driver = driver
+        self.context_id = context_id
+        self.target_id = target_id
+
+
+class BrowserPool:
+    """
+    浏览器复用池
+    
+    每个工作线程只启动一次 Chrome，每个账号在独立的浏览器上下文
+    （Target.createBrowserContext）中运行，Cookie 与存储互不可见；账号结束后销毁上下文，
+    浏览器崩溃时自动重启。浏览器上下文不可用或初始化失败时回退为清空 Cookie 与站点存储后复用主标签页。
+    """
+    
+    def __init__(self):
+        self._local = threading.local()
+        self._drivers: List = []
+        self._lock = threading.Lock()
+    
+    def acquire(self, config: dict, launch: Callable, prepare: Callable) -> BrowserLease:
+        """
+        为账号分配浏览器
+        
+        Args:
+            launch: 启动浏览器，launch(config) -> driver
+            prepare: 为新标签页注入反检测脚本、资源拦截等，prepare(driver)
+        """
+        if not config.get("reuse_browser", True):
+            driver = launch(config)
+            prepare(driver)
+            return BrowserLease(driver)
+        
+        driver = self._get_driver(config, launch)
+        try:
+            context_id = driver.execute_cdp_cmd(
+                "Target.createBrowserContext", {"disposeOnDetach": True}
+            )["browserContextId"]
+        except Exception as e:
+            logger.info(f"   浏览器上下文不可用，回退为清理后复用: {e}")
+            return self._fallback(driver, config, launch, prepare)
+        
+        try:
+            target_id = driver.execute_cdp_cmd("Target.createTarget", {
+                "url": "about:blank",
+                "browserContextId": context_id
+            })["targetId"]
+            driver.switch_to.window(target_id)
+            prepare(driver)
+        except Exception as e:
+            logger.info(f"   浏览器上下文初始化失败，回退为清理后复用: {e}")
+            self._dispose(driver, context_id)
+            return self._fallback(driver, config, launch, prepare)
+        
+        logger.info("🧩 已创建独立浏览器上下文")
+        return BrowserLease(driver, context_id, target_id)
+    
+    def release(self, lease: BrowserLease):
+        """归还浏览器：销毁账号上下文，出错时关闭浏览器以便下次重启"""
+        driver = lease.driver
+        if getattr(self._local, "driver", None) is not driver:
+            self._quit(driver)
+            return
+        
+        try:
+            if lease.context_id:
+                driver.switch_to.window(self._local.home)
+                driver.execute_cdp_cmd("Target.closeTarget", {"targetId": lease.target_id})
+                self._dispose(driver, lease.context_id)
+            else:
+                self._clear_storage(driver)
+                driver.get("about:blank")
+            logger.info("🧹 账号浏览器上下文已清理")
+        except Exception as e:
+            logger.warning(f"⚠️  清理浏览器上下文失败，将重启浏览器: {e}")
+            self._drop(driver)
+    
+    def close_all(self):
+        """关闭所有复用的浏览器"""
+        with self._lock:
+            drivers, self._drivers = self._drivers, []
+        for driver in drivers:
+            self._quit(driver)
+    
+    def _get_driver(self, config: dict, launch: Callable):
+        """获取当前线程的浏览器，不存在或已崩溃时重新启动"""
+        driver = getattr(self._local, "driver", None)
+        if driver is not None:
+            try:
+                handles = driver.window_handles
+                if self._local.home in handles:
+                    return driver
+                logger.warning("⚠️  浏览器主标签页已丢失，重启浏览器")
+            except Exception as e:
+                logger.warning(f"⚠️  浏览器已失去响应，重启浏览器: {type(e).__name__}")
+            self._drop(driver)
+        
+        driver = launch(config)
+        self._local.driver = driver
+        self._local.home = driver.current_window_handle
+        self._local.home_prepared = False
+        with self._lock:
+            self._drivers.append(driver)
+        return driver
+    
+    def _fallback(self, driver, config: dict, launch: Callable, prepare: Callable) -> BrowserLease:
+        """回退模式：清空存储后复用主标签页，主标签页也不可用时重启浏览器"""
+        try:
+            return self._reuse_home(driver, prepare)
+        except Exception as e:
+            logger.warning(f"⚠️  复用主标签页失败，重启浏览器: {e}")
+            self._drop(driver)
+        return self._reuse_home(self._get_driver(config, launch), prepare)
+    
+    def _reuse_home(self, driver, prepare: Callable) -> BrowserLease:
+        """清空 Cookie 与站点存储后复用主标签页"""
+        driver.switch_to.window(self._local.home)
+        self._clear_storage(driver)
+        # 主标签页只需准备一次，避免重复注册反检测脚本
+        if not self._local.home_prepared:
+            prepare(driver)
+            self._local.home_prepared = True
+        return BrowserLease(driver)
+    
+    def _drop(self, driver):
+        """移除并关闭浏览器"""
+        if getattr(self._local, "driver", None) is driver:
+            self._local.driver = None
+        with self._lock:
+            if driver in self._drivers:
+                self._drivers.remove(driver)
+        self._quit(driver)
+    
+    @staticmethod
+    def _dispose(driver, context_id: str):
+        """销毁浏览器上下文"""
+        try:
+            driver.execute_cdp_cmd("Target.disposeBrowserContext", {"browserContextId": context_id})
+        except Exception as e:
+            logger.debug(f"销毁浏览器上下文失败: {e}")
+    
+    @staticmethod
+    def _clear_storage(driver):
+        """清空 Cookie 与站点存储（回退模式）"""
+        driver.execute_cdp_cmd("Network.clearBrowserCookies", {})
+        for origin in CLEAR_ORIGINS:
+            driver.execute_cdp_cmd("Storage.clearDataForOrigin", {"origin": origin, "storageTypes": "all"})
+    
+    @staticmethod
+    def _quit(driver):
+        """关闭浏览器"""
+        try:
+            driver.quit()
+            logger.info("🔒 浏览器已关闭")
+        except Exception as e:
+            logger.warning(f"⚠️  关闭浏览器失败: {e}")
+
+
+# 全局浏览器复用池
+BROWSERS = BrowserPool()
@@ -1,27 +1,109 @@
+import base64
 import logging
 import os
 import random
 import re
 import time
-from typing import Tuple
+from concurrent.futures import Future, ThreadPoolExecutor
+from dataclasses import dataclass
+from itertools import permutations
+from typing import List, Optional, Tuple
 
 import cv2
-import requests
-from selenium.common import TimeoutException, NoSuchElementException
+import numpy as np
+from selenium.common import TimeoutException, NoSuchElementException, StaleElementReferenceException
 from selenium.webdriver import ActionChains
 from selenium.webdriver.common.by import By
 from selenium.webdriver.support import expected_conditions as EC
+from selenium.webdriver.support.wait import WebDriverWait
+
+from captcha_cache import CaptchaCache, image_hash
+from captcha_recorder import CaptchaRecorder
+from http_pool import get_session
+from metrics import METRICS, CaptchaSession
 
 logger = logging.getLogger(__name__)
 
+# tcOperation 出现以下 class 时表示验证结果已返回
+RESULT_CLASSES = ("show-success", "show-fail", "show-error")
+
+# 碎片预检阈值：灰度标准差低于此值视为空白；部件面积占比下限；边缘像素占比下限
+SPRITE_MIN_STD = 4.0
+SPRITE_MIN_PART_RATIO = 0.01
+SPRITE_MIN_EDGE_DENSITY = 0.04
+
 
 class CaptchaRetryableError(Exception):
     """可重试的验证码错误"""
     pass
 
 
-def process_captcha(ctx, config: dict) -> bool:
-    """处理验证码（循环模式）"""
+@dataclass
+class CaptchaImages:
+    """验证码图片（原始字节与解码后的图像，全程在内存中传递）"""
+    background_bytes: bytes
+    sprite_bytes: bytes
+    background: np.ndarray
+    sprite: np.ndarray
+
+
+@dataclass
+class CaptchaFetch:
+    """进行中的验证码图片获取（背景图与碎片图并发下载，结果为图片字节或 None）"""
+    background: Future
+    sprite: Future
+    
+    def result(self) -> Optional[CaptchaImages]:
+        """等待两张图片并解码"""
+        background_bytes = self.background.result()
+        if background_bytes is None:
+            logger.error("   背景图下载失败")
+            return None
+        
+        sprite_bytes = self.sprite.result()
+        if sprite_bytes is None:
+            logger.error("   碎片图下载失败")
+            return None
+        
+        background = decode_image(background_bytes)
+        if background is None:
+            logger.error("   验证码背景图解码失败")
+            return None
+        
+        sprite = decode_image(sprite_bytes)
+        if sprite is None:
+            logger.error("   验证码碎片图解码失败")
+            return None
+        
+        return CaptchaImages(
+            background_bytes=background_bytes,
+            sprite_bytes=sprite_bytes,
+            background=background,
+            sprite=sprite
+        )
+
+
+def process_captcha(ctx, config: dict, purpose: str = "") -> bool:
+    """
+    处理验证码（循环模式）
+    
+    Args:
+        purpose: 触发场景（如 login / sign_in），用于运行指标
+    """
+    metrics = METRICS.captcha_session(getattr(ctx, "username", ""), purpose)
+    # 图片下载与图案检测在后台线程中进行
+    executor = ThreadPoolExecutor(max_workers=3, thread_name_prefix="captcha")
+    success = False
+    try:
+        success = _captcha_loop(ctx, config, metrics, executor)
+        return success
+    finally:
+        metrics.finish(success)
+        executor.shutdown(wait=False)
+
+
+def _captcha_loop(ctx, config: dict, metrics: CaptchaSession, executor: ThreadPoolExecutor) -> bool:
+    """验证码重试循环"""
     retry_limit = config["captcha_retry_limit"]
     is_unlimited = (retry_limit == -1)
     
@@ -29,6 +111,9 @@ def process_captcha(ctx, config: dict) -> bool:
         logger.info("⚠️  验证码无限重试模式已启用")
     
     retry_count = 0
+    matcher = SpriteMatcher.from_config(config)
+    cache = CaptchaCache.from_config(config)
+    recorder = CaptchaRecorder.from_config(config)
     
     while True:
         # 检查重试次数
@@ -37,6 +122,9 @@ def process_captcha(ctx, config: dict) -> bool:
             return False
         
         retry_count += 1
+        metrics.start_attempt()
+        images = None
+        trace = {}
         
         if is_unlimited:
             logger.info(f"🔄 验证码处理第 {retry_count} 次尝试（无限重试模式）")
@@ -46,157 +134,344 @@ def process_captcha(ctx, config: dict) -> bool:
         try:
             # 下载验证码图片
             logger.info("📥 开始下载验证码图片...")
-            if not download_captcha_img(ctx, config):
+            with metrics.stage("download"):
+                fetch = download_captcha_img(ctx, config, executor)
+            if fetch is None:
                 raise CaptchaRetryableError("验证码图片下载失败")
-            logger.info("✅ 验证码图片下载成功")
-            
-            # 校验验证码有效性
-            logger.info("🔍 校验验证码碎片有效性...")
-            if not check_captcha(ctx):
-                raise CaptchaRetryableError("验证码碎片无效")
-            logger.info("✅ 验证码碎片有效")
-            
-            # 识别验证码
-            logger.info("🤖 开始识别验证码...")
-            captcha = cv2.imread(ctx.temp_path("captcha.jpg"))
-            if captcha is None:
-                raise CaptchaRetryableError("验证码背景图读取失败")
-            
-            with open(ctx.temp_path("captcha.jpg"), "rb") as f:
-                bboxes = ctx.det.detection(f.read())
             
-            if not bboxes:
-                raise CaptchaRetryableError("未检测到验证码图案")
+            # 未启用缓存时，背景图到达后立即开始检测，与碎片图下载、校验并行
+            detect_future = None
+            if cache is None:
+                detect_future = executor.submit(detect_patterns, ctx, fetch.background)
             
-            logger.info(f"   检测到 {len(bboxes)} 个图案区域")
-            
-            # 匹配碎片与背景图
-            result = {}
-            for i, (x1, y1, x2, y2) in enumerate(bboxes):
-                cv2.imwrite(ctx.temp_path(f"spec_{i+1}.jpg"), captcha[y1:y2, x1:x2])
-                
-                for j in range(3):
-                    sim, matched = compute_similarity(
-                        ctx.temp_path(f"sprite_{j+1}.jpg"),
-                        ctx.temp_path(f"spec_{i+1}.jpg")
-                    )
-                    key_sim = f"sprite_{j+1}.similarity"
-                    key_pos = f"sprite_{j+1}.position"
-                    
-                    if sim > float(result.get(key_sim, 0)):
-                        result[key_sim] = sim
-                        result[key_pos] = f"{int((x1+x2)/2)},{int((y1+y2)/2)}"
+            with metrics.stage("download"):
+                images = fetch.result()
+            if images is None:
+                raise CaptchaRetryableError("验证码图片下载失败")
+            logger.info("✅ 验证码图片下载成功")
+            dump_debug_image(ctx, retry_count, "captcha.jpg", images.background_bytes)
+            dump_debug_image(ctx, retry_count, "sprite.jpg", images.sprite_bytes)
             
-            # 校验答案
-            if not check_answer(result, config["similarity_threshold"]):
-                # 输出匹配率信息
-                for i in range(3):
-                    sim = result.get(f"sprite_{i+1}.similarity", 0)
-                    pos = result.get(f"sprite_{i+1}.position", "N/A")
-                    logger.warning(f"   图案 {i+1}: 位置={pos}, 匹配率={sim:.4f}")
-                raise CaptchaRetryableError("验证码答案无效")
+            # 命中已验证通过的答案时跳过识别
+            result = None
+            if cache:
+                with metrics.stage("cache"):
+                    bg_hash = image_hash(images.background)
+                    solution_key = f"solution:{bg_hash}:{image_hash(images.sprite)}"
+                    result = cache.get(solution_key)
+                if result:
+                    logger.info("⚡ 命中验证码答案缓存，跳过识别")
+                else:
+                    # 答案未命中才检测，与碎片校验并行；检测缓存与失效使用同一个背景哈希
+                    detect_future = executor.submit(detect_patterns, ctx, fetch.background, cache, bg_hash)
             
-            logger.info("✅ 验证码识别成功")
+            # 识别验证码
+            from_cache = result is not None
+            trace["from_cache"] = from_cache
+            if not from_cache:
+                timings = {}
+                try:
+                    result, margin = solve_captcha(ctx, images, matcher, config, retry_count, timings, detect_future, trace)
+                finally:
+                    for stage, elapsed in timings.items():
+                        metrics.record(stage, elapsed)
+            trace["answer"] = result
             
             # 点击验证码
-            click_captcha(ctx, result, captcha)
+            with metrics.stage("click"):
+                trace.update(click_captcha(ctx, result, images.background))
             
             # 提交验证码
             logger.info("📤 提交验证码")
-            confirm = ctx.wait.until(
-                EC.element_to_be_clickable((By.XPATH, "//div[@id='tcStatus']/div[2]/div[2]/div/div"))
-            )
-            confirm.click()
+            with metrics.stage("submit"):
+                confirm = ctx.wait.until(
+                    EC.element_to_be_clickable((By.XPATH, "//div[@id='tcStatus']/div[2]/div[2]/div/div"))
+                )
+                confirm.click()
             logger.info("⏳ 等待验证结果...")
-            time.sleep(5)
+            with metrics.stage("result_wait"):
+                result_class = wait_captcha_result(ctx, config.get("captcha_result_timeout", 10))
+            trace["result_class"] = result_class
             
             # 校验结果
-            result_el = ctx.wait.until(
-                EC.visibility_of_element_located((By.ID, "tcOperation"))
-            )
-            if "show-success" in result_el.get_attribute("class"):
+            if "show-success" in result_class:
                 logger.info("✅ 验证码验证通过")
+                if cache and not from_cache:
+                    cache.put(solution_key, result)
+                _record_attempt(recorder, metrics, retry_count, images, trace, "success")
                 return True
             else:
                 logger.error("❌ 验证码验证失败")
+                if cache:
+                    # 缓存的检测结果或答案可能有误，下次重新识别
+                    cache.delete(f"bbox:{bg_hash}")
+                    cache.delete(solution_key)
                 raise CaptchaRetryableError("验证码验证失败")
         
         except (TimeoutException, ValueError, CaptchaRetryableError) as e:
             logger.error(f"❌ 验证码处理失败: {e}")
+            metrics.fail("超时" if isinstance(e, TimeoutException) else str(e))
+            _record_attempt(recorder, metrics, retry_count, images, trace,
+                            "超时" if isinstance(e, TimeoutException) else str(e))
             
             # 刷新验证码
             logger.info("🔄 刷新验证码中，稍后重试...")
-            if not refresh_captcha(ctx):
+            with metrics.stage("refresh"):
+                refreshed = refresh_captcha(ctx)
+            if not refreshed:
                 return False
             
             # 指数退避（上限30秒）
             delay = min(3 * (2 ** (retry_count - 1)), 30)
             logger.info(f"⏳ 等待 {delay} 秒后重试...")
-            time.sleep(delay)
+            with metrics.stage("backoff"):
+                time.sleep(delay)
 
 
-def download_captcha_img(ctx, config: dict) -> bool:
-    """下载验证码图片"""
+def solve_captcha(ctx, images: CaptchaImages, matcher: "SpriteMatcher", config: dict,
+                  attempt: int = 0, timings: Optional[dict] = None,
+                  detect_future: Optional[Future] = None,
+                  trace: Optional[dict] = None) -> Tuple[dict, float]:
+    """
+    识别验证码：碎片校验 → 图案检测 → 特征匹配 → 最优分配 → 答案校验
+    
+    Args:
+        timings: 传入时记录各阶段耗时（秒）
+        detect_future: 已在后台进行的图案检测，为空时同步检测
+        trace: 传入时记录中间结果（检测框、相似度矩阵、置信差）
+    
+    Returns:
+        (识别结果, 置信差)
+    
+    Raises:
+        CaptchaRetryableError: 任一阶段失败
+    """
+    if timings is None:
+        timings = {}
+    if trace is None:
+        trace = {}
+    
+    # 校验验证码有效性
+    logger.info("🔍 校验验证码碎片有效性...")
+    start = time.perf_counter()
+    sprites = split_sprite(images.sprite)
+    valid = check_captcha(ctx, sprites)
+    timings["validate"] = time.perf_counter() - start
+    if not valid:
+        raise CaptchaRetryableError("验证码碎片无效")
+    logger.info("✅ 验证码碎片有效")
+    
+    # 识别验证码（直接使用下载的原始字节，避免重新编码）
+    logger.info("🤖 开始识别验证码...")
+    captcha = images.background
+    start = time.perf_counter()
     try:
-        # 清空旧文件
-        clear_temp_dir(ctx.temp_dir)
-        
-        # 下载背景图
+        if detect_future is not None:
+            bboxes = detect_future.result()
+        else:
+            bboxes = ctx.det.detection(images.background_bytes)
+    except Exception as e:
+        raise CaptchaRetryableError(f"图案检测失败: {e}")
+    timings["detect"] = time.perf_counter() - start
+    trace["bboxes"] = [list(map(int, bbox)) for bbox in bboxes]
+    
+    if not bboxes:
+        raise CaptchaRetryableError("未检测到验证码图案")
+    
+    logger.info(f"   检测到 {len(bboxes)} 个图案区域")
+    
+    # 匹配碎片与背景图（碎片与区域特征各提取一次）
+    regions = []
+    for i, (x1, y1, x2, y2) in enumerate(bboxes):
+        spec = captcha[y1:y2, x1:x2]
+        dump_debug_image(ctx, attempt, f"spec_{i+1}.png", spec)
+        regions.append(spec)
+    
+    start = time.perf_counter()
+    matrix = matcher.similarity_matrix(sprites, regions)
+    timings["match"] = time.perf_counter() - start
+    trace["matrix"] = matrix
+    logger.info(f"   {matcher.format_timings()}")
+    
+    # 全局最优分配，避免多个碎片落到同一位置
+    start = time.perf_counter()
+    result, margin = assign_sprites(matrix, bboxes)
+    timings["assign"] = time.perf_counter() - start
+    trace["margin"] = margin
+    if not result:
+        raise CaptchaRetryableError(f"检测区域不足（{len(bboxes)} 个）")
+    logger.info(f"   最优分配置信差: {margin:.4f}")
+    
+    # 校验答案
+    if not check_answer(result, config["match_confidence_threshold"]):
+        # 输出匹配率信息
+        for i in range(3):
+            sim = result.get(f"sprite_{i+1}.similarity", 0)
+            pos = result.get(f"sprite_{i+1}.position", "N/A")
+            logger.warning(f"   图案 {i+1}: 位置={pos}, 匹配率={sim:.4f}")
+        raise CaptchaRetryableError("验证码答案无效")
+    
+    logger.info("✅ 验证码识别成功")
+    return result, margin
+
+
+def download_captcha_img(ctx, config: dict, executor: ThreadPoolExecutor) -> Optional[CaptchaFetch]:
+    """
+    获取验证码图片（优先读取浏览器已加载的图片，失败时并发回退 HTTP 下载）
+    
+    Returns:
+        进行中的图片获取，读取图片地址失败时返回 None
+    """
+    try:
+        # 读取图片地址
         slide_bg = ctx.wait.until(
             EC.visibility_of_element_located((By.ID, "slideBg"))
         )
         img1_style = slide_bg.get_attribute("style")
         img1_url = get_url_from_style(img1_style)
-        
         logger.info(f"   验证码背景图URL: {img1_url}")
-        if not download_image(img1_url, ctx.temp_path("captcha.jpg"), config):
-            logger.error("   背景图下载失败")
-            return False
-        logger.info("   ✓ 背景图下载成功")
         
-        # 下载碎片图
         sprite = ctx.wait.until(
             EC.visibility_of_element_located((By.XPATH, "//div[@id='instruction']//img"))
         )
         img2_url = sprite.get_attribute("src")
-        
         logger.info(f"   验证码碎片图URL: {img2_url}")
-        if not download_image(img2_url, ctx.temp_path("sprite.jpg"), config):
-            logger.error("   碎片图下载失败")
-            return False
-        logger.info("   ✓ 碎片图下载成功")
         
-        return True
+        # 从浏览器缓存读取（浏览器内两张图片并行读取）
+        captured = [None, None]
+        if config.get("captcha_capture_mode", "browser") == "browser":
+            captured = capture_images_from_browser(
+                ctx.driver, [img1_url, img2_url], config.get("download_timeout", 10)
+            )
+        
+        # 未能读取的图片并发下载
+        futures = []
+        for name, url, data in (("背景图", img1_url, captured[0]), ("碎片图", img2_url, captured[1])):
+            if data is not None:
+                logger.info(f"   ✓ {name}已从浏览器读取")
+                future = Future()
+                future.set_result(data)
+            else:
+                future = executor.submit(download_image, url, config)
+            futures.append(future)
+        
+        return CaptchaFetch(background=futures[0], sprite=futures[1])
         
     except TimeoutException:
         logger.error("❌ 验证码图片加载超时")
-        return False
+        return None
     except Exception as e:
         logger.error(f"❌ 验证码图片下载失败: {e}")
-        return False
+        return None
+
+
+def _record_attempt(recorder: Optional[CaptchaRecorder], metrics: CaptchaSession, attempt: int,
+                    images: Optional[CaptchaImages], trace: dict, outcome: str):
+    """将本次尝试写入记录归档（未启用或图片未下载时跳过）"""
+    if recorder is None or images is None:
+        return
+    meta = {
+        "username": metrics.username,
+        "purpose": metrics.purpose,
+        "attempt": attempt,
+        "outcome": outcome,
+        "stages": metrics.current["stages"],
+        **trace
+    }
+    recorder.record(meta, images.background_bytes, images.sprite_bytes)
+
 
+def detect_patterns(ctx, background: Future, cache: Optional[CaptchaCache] = None,
+                    bg_hash: Optional[str] = None) -> list:
+    """
+    背景图到达后执行图案检测（优先使用缓存的检测结果）
+    
+    Args:
+        bg_hash: 背景图哈希，提供 cache 时必须同时提供
+    """
+    background_bytes = background.result()
+    if background_bytes is None:
+        return []
+    
+    key = None
+    if cache and bg_hash:
+        key = f"bbox:{bg_hash}"
+        bboxes = cache.get(key)
+        if bboxes:
+            logger.info("⚡ 命中图案检测缓存")
+            return bboxes
+    
+    bboxes = ctx.det.detection(background_bytes)
+    if key and bboxes:
+        cache.put(key, bboxes)
+    return bboxes
 
-def download_image(url: str, output_path: str, config: dict) -> bool:
-    """下载图片（带重试）"""
+
+# 在验证码 iframe 内并行读取图片（force-cache 优先命中浏览器已缓存的响应）
+CAPTURE_IMAGES_JS = """
+var urls = arguments[0], done = arguments[arguments.length - 1];
+function toBase64(buf) {
+    var bytes = new Uint8Array(buf), chunks = [];
+    for (var i = 0; i < bytes.length; i += 0x8000) {
+        chunks.push(String.fromCharCode.apply(null, bytes.subarray(i, i + 0x8000)));
+    }
+    return btoa(chunks.join(''));
+}
+Promise.all(urls.map(function (url) {
+    return fetch(url, {cache: 'force-cache'})
+        .then(function (r) {
+            if (!r.ok) throw new Error('HTTP ' + r.status);
+            return r.arrayBuffer();
+        })
+        .then(function (buf) { return {data: toBase64(buf)}; })
+        .catch(function (e) { return {error: String(e)}; });
+})).then(done);
+"""
+
+
+def capture_images_from_browser(driver, urls: List[str], timeout: float) -> List[Optional[bytes]]:
+    """
+    从浏览器读取已加载的图片
+    
+    Returns:
+        与 urls 一一对应的图片字节，读取失败的位置为 None
+    """
+    try:
+        driver.set_script_timeout(timeout)
+        results = driver.execute_async_script(CAPTURE_IMAGES_JS, urls)
+    except Exception as e:
+        logger.warning(f"   浏览器读取图片失败，回退 HTTP 下载: {e}")
+        return [None] * len(urls)
+    
+    images = []
+    for url, item in zip(urls, results or []):
+        data = (item or {}).get("data")
+        if data:
+            images.append(base64.b64decode(data))
+        else:
+            logger.warning(f"   浏览器读取图片失败，回退 HTTP 下载: {(item or {}).get('error')}")
+            images.append(None)
+    images += [None] * (len(urls) - len(images))
+    return images
+
+
+def download_image(url: str, config: dict) -> Optional[bytes]:
+    """下载图片（带重试），返回图片字节"""
     max_retries = config.get("download_max_retries", 3)
     retry_delay = config.get("download_retry_delay", 2)
     timeout = config.get("download_timeout", 10)
     
-    os.makedirs(os.path.dirname(output_path), exist_ok=True)
-    
     headers = {
         "User-Agent": "Mozilla/5.0 (X11; Linux x86_64) AppleWebKit/537.36",
         "Referer": "https://app.rainyun.com/"
     }
     
+    session = get_session(config.get("http_pool_size", 16))
     for attempt in range(1, max_retries + 1):
         try:
-            response = requests.get(url, headers=headers, timeout=timeout)
+            response = session.get(url, headers=headers, timeout=timeout)
             response.raise_for_status()
-            
-            with open(output_path, "wb") as f:
-                f.write(response.content)
-            return True
+            return response.content
             
         except Exception as e:
             if attempt < max_retries:
@@ -204,31 +479,86 @@ def download_image(url: str, output_path: str, config: dict) -> bool:
                 time.sleep(retry_delay)
             else:
                 logger.error(f"   下载失败 (已重试 {max_retries} 次): {e}")
-                return False
+                return None
+
+
+def decode_image(data: bytes, flags: int = cv2.IMREAD_COLOR) -> Optional[np.ndarray]:
+    """将图片字节解码为图像数组"""
+    if not data:
+        return None
+    return cv2.imdecode(np.frombuffer(data, dtype=np.uint8), flags)
+
+
+def encode_image(img: np.ndarray) -> bytes:
+    """将图像数组无损编码为 PNG 字节"""
+    ok, buf = cv2.imencode(".png", img)
+    if not ok:
+        raise ValueError("图片编码失败")
+    return buf.tobytes()
+
+
+def split_sprite(sprite: np.ndarray) -> List[np.ndarray]:
+    """将碎片图横向切分为三个图案"""
+    w = sprite.shape[1]
+    return [sprite[:, w // 3 * i: w // 3 * (i + 1)] for i in range(3)]
+
+
+def prefilter_sprite(sprite: np.ndarray) -> Optional[bool]:
+    """
+    碎片快速预检（不调用 OCR）
+    
+    Returns:
+        False 明显无效（空白碎片）；True 明显有效（由多个部件组成的图案，
+        不可能被识别为单个数字 0/1）；None 无法判断，需 OCR 校验
+    """
+    gray = to_gray(sprite)
+    if float(gray.std()) < SPRITE_MIN_STD:
+        return False
+    
+    # Otsu 二值化后取面积较小的一类作为前景
+    _, mask = cv2.threshold(gray, 0, 255, cv2.THRESH_BINARY + cv2.THRESH_OTSU)
+    if np.count_nonzero(mask) > mask.size / 2:
+        mask = cv2.bitwise_not(mask)
+    
+    edge_density = np.count_nonzero(cv2.Canny(gray, 50, 150)) / gray.size
+    n, _, stats, _ = cv2.connectedComponentsWithStats(mask, connectivity=8)
+    min_area = SPRITE_MIN_PART_RATIO * gray.size
+    parts = int(np.count_nonzero(stats[1:n, cv2.CC_STAT_AREA] >= min_area))
+    
+    if parts >= 2 and edge_density >= SPRITE_MIN_EDGE_DENSITY:
+        return True
+    return None
+
 
+def classify_many(ocr, images: List[bytes]) -> List[str]:
+    """逐张 OCR（共享模型支持时在一次加锁内完成）"""
+    classify = getattr(ocr, "classification_many", None)
+    if classify is not None:
+        return classify(images)
+    return [ocr.classification(img) for img in images]
 
-def check_captcha(ctx) -> bool:
-    """校验验证码碎片有效性"""
+
+def check_captcha(ctx, sprites: List[np.ndarray]) -> bool:
+    """校验验证码碎片有效性（预检可判定的碎片不再调用 OCR）"""
     try:
-        raw = cv2.imread(ctx.temp_path("sprite.jpg"))
-        if raw is None:
-            logger.error("   验证码碎片图读取失败")
-            return False
+        pending = []
+        for i, temp in enumerate(sprites):
+            verdict = prefilter_sprite(temp)
+            if verdict is False:
+                logger.warning(f"   碎片 {i+1} 无效（空白碎片）")
+                return False
+            if verdict is None:
+                pending.append(i)
         
-        # 分割碎片
-        w = raw.shape[1]
-        for i in range(3):
-            temp = raw[:, w // 3 * i: w // 3 * (i + 1)]
-            cv2.imwrite(ctx.temp_path(f"sprite_{i+1}.jpg"), temp)
-            
-            # 检查是否为无效图片
-            with open(ctx.temp_path(f"sprite_{i+1}.jpg"), "rb") as f:
-                ocr_result = ctx.ocr.classification(f.read())
+        # 检查是否为无效图片
+        if pending:
+            ocr_results = classify_many(ctx.ocr, [encode_image(sprites[i]) for i in pending])
+            for i, ocr_result in zip(pending, ocr_results):
                 if ocr_result in ["0", "1"]:
                     logger.warning(f"   碎片 {i+1} 无效（OCR结果: {ocr_result}）")
                     return False
         
-        logger.info("   ✓ 所有碎片有效")
+        logger.info(f"   ✓ 所有碎片有效（预检判定 {len(sprites) - len(pending)} 个，OCR 校验 {len(pending)} 个）")
         return True
         
     except Exception as e:
@@ -236,6 +566,58 @@ def check_captcha(ctx) -> bool:
         return False
 
 
+def dump_debug_image(ctx, attempt: int, filename: str, data):
+    """调试模式下将验证码图片写入调试目录"""
+    if not getattr(ctx, "debug_dir", None):
+        return
+    
+    try:
+        attempt_dir = os.path.join(ctx.debug_dir, f"attempt_{attempt}")
+        os.makedirs(attempt_dir, exist_ok=True)
+        if isinstance(data, np.ndarray):
+            data = encode_image(data)
+        with open(os.path.join(attempt_dir, filename), "wb") as f:
+            f.write(data)
+    except Exception as e:
+        logger.warning(f"   调试图片保存失败: {e}")
+
+
+def assign_sprites(matrix: List[List[float]], bboxes: list) -> Tuple[dict, float]:
+    """
+    求解碎片到区域的全局最优分配
+    
+    枚举区域排列（3 个碎片，区域数量很少），取相似度总和最大的方案。
+    
+    Returns:
+        (识别结果, 置信差)，置信差为最优与次优方案的相似度总和之差；
+        区域不足 3 个时返回 ({}, 0.0)
+    """
+    n_sprites = len(matrix)
+    n_regions = len(bboxes)
+    if n_regions < n_sprites:
+        return {}, 0.0
+    
+    best_score = second_score = -1.0
+    best_perm = None
+    for perm in permutations(range(n_regions), n_sprites):
+        score = sum(matrix[j][i] for j, i in enumerate(perm))
+        if score > best_score:
+            second_score = best_score
+            best_score, best_perm = score, perm
+        elif score > second_score:
+            second_score = score
+    
+    result = {}
+    for j, i in enumerate(best_perm):
+        x1, y1, x2, y2 = bboxes[i]
+        result[f"sprite_{j+1}.similarity"] = matrix[j][i]
+        result[f"sprite_{j+1}.position"] = f"{int((x1+x2)/2)},{int((y1+y2)/2)}"
+    
+    # 仅有一种方案时，置信差即为其相似度总和
+    margin = best_score - second_score if second_score >= 0 else best_score
+    return result, margin
+
+
 def check_answer(result: dict, threshold: float) -> bool:
     """检查验证码答案有效性"""
     if not result or len(result) < 6:
@@ -259,8 +641,13 @@ def check_answer(result: dict, threshold: float) -> bool:
     return True
 
 
-def click_captcha(ctx, result: dict, captcha_img):
-    """点击验证码图案"""
+def click_captcha(ctx, result: dict, captcha_img) -> dict:
+    """
+    点击验证码图案
+    
+    Returns:
+        显示尺寸与实际点击坐标（相对图片中心），供记录器使用
+    """
     slide_bg = ctx.wait.until(
         EC.visibility_of_element_located((By.ID, "slideBg"))
     )
@@ -282,6 +669,7 @@ def click_captcha(ctx, result: dict, captcha_img):
     logger.info(f"   验证码原始尺寸: {width_raw}x{height_raw} px")
     
     # 依次点击三个图案
+    clicks = []
     for i in range(3):
         pos = result[f"sprite_{i+1}.position"]
         sim = result[f"sprite_{i+1}.similarity"]
@@ -301,64 +689,283 @@ def click_captcha(ctx, result: dict, captcha_img):
         ActionChains(ctx.driver).move_to_element_with_offset(
             slide_bg, final_x, final_y
         ).click().perform()
+        clicks.append([final_x, final_y])
         
         time.sleep(random.uniform(0.5, 1))
+    
+    return {"display": [width, height], "clicks": clicks}
 
 
-def compute_similarity(img1_path: str, img2_path: str) -> Tuple[float, int]:
-    """计算两张图片的相似度"""
-    try:
-        img1 = cv2.imread(img1_path, cv2.IMREAD_GRAYSCALE)
-        img2 = cv2.imread(img2_path, cv2.IMREAD_GRAYSCALE)
-        
-        if img1 is None or img2 is None:
-            return 0.0, 0
+def foreground_mask(img: np.ndarray) -> np.ndarray:
+    """Otsu 二值化，取面积较小的一类作为前景（与明暗极性无关）"""
+    gray = to_gray(img)
+    _, mask = cv2.threshold(gray, 0, 255, cv2.THRESH_BINARY + cv2.THRESH_OTSU)
+    if np.count_nonzero(mask) > mask.size / 2:
+        mask = cv2.bitwise_not(mask)
+    return mask
+
+
+class KeypointScorer:
+    """特征点匹配：SIFT（不可用时降级 ORB）+ Lowe 比值检验，得分为有效匹配占比"""
+    
+    name = "keypoint"
+    # 校准参数（logistic 斜率, 中心），由 captcha_bench 合成验证码的正负样本分布拟合，
+    # 未使用线上真实验证码校验；可用 captcha_replay 对录制的真实样本复核
+    calibration = (10.0, 0.44)
+    
+    def __init__(self, ratio: float = 0.8):
+        self.ratio = ratio
         
         # 优先使用 SIFT，降级 ORB
         try:
-            detector = cv2.SIFT_create()
+            self.detector = cv2.SIFT_create()
             norm = cv2.NORM_L2
         except AttributeError:
-            detector = cv2.ORB_create()
+            self.detector = cv2.ORB_create()
             norm = cv2.NORM_HAMMING
         
-        kp1, des1 = detector.detectAndCompute(img1, None)
-        kp2, des2 = detector.detectAndCompute(img2, None)
-        
+        self.matcher = cv2.BFMatcher(norm, crossCheck=False)
+    
+    def features(self, img: np.ndarray, role: str = "") -> Optional[np.ndarray]:
+        """提取特征描述子"""
+        if img is None or img.size == 0:
+            return None
+        _, des = self.detector.detectAndCompute(to_gray(img), None)
+        return des
+    
+    def match(self, des1: Optional[np.ndarray], des2: Optional[np.ndarray]) -> Tuple[float, int]:
+        """比较两组描述子，返回（相似度, 有效匹配数）"""
         if des1 is None or des2 is None:
             return 0.0, 0
         
-        bf = cv2.BFMatcher(norm, crossCheck=False)
-        matches = bf.knnMatch(des1, des2, k=2)
+        matches = self.matcher.knnMatch(des1, des2, k=2)
+        if not matches:
+            return 0.0, 0
         
-        good = []
+        good = 0
         for match in matches:
             if len(match) == 2:
                 m, n = match
-                if m.distance < 0.8 * n.distance:
-                    good.append(m)
+                if m.distance < self.ratio * n.distance:
+                    good += 1
         
-        if not matches:
-            return 0.0, 0
+        return good / len(matches), good
+    
+    def score(self, des1, des2) -> float:
+        return self.match(des1, des2)[0]
+
+
+class EdgeTemplateScorer:
+    """边缘图模板匹配：碎片图案在多个尺度与角度下与区域边缘图做归一化相关"""
+    
+    name = "edge"
+    calibration = (20.0, 0.61)
+    
+    SIZE = 48
+    PAD = 6
+    SCALES = (0.8, 0.9, 1.0)
+    ANGLES = (-30, -15, 0, 15, 30)
+    
+    @staticmethod
+    def _edges(gray: np.ndarray) -> np.ndarray:
+        """边缘图（轻微模糊以容忍形变）"""
+        edges = cv2.Canny(gray, 50, 150).astype(np.float32)
+        return cv2.GaussianBlur(edges, (0, 0), 1.5)
+    
+    def features(self, img: np.ndarray, role: str = "") -> List[np.ndarray]:
+        if img is None or img.size == 0:
+            return []
+        gray = to_gray(img)
         
-        similarity = len(good) / len(matches)
-        return similarity, len(good)
+        if role != "sprite":
+            region = cv2.resize(gray, (self.SIZE, self.SIZE), interpolation=cv2.INTER_AREA)
+            region = cv2.copyMakeBorder(region, self.PAD, self.PAD, self.PAD, self.PAD, cv2.BORDER_REPLICATE)
+            return [self._edges(region)]
         
-    except Exception as e:
-        logger.error(f"相似度计算失败: {e}")
-        return 0.0, 0
+        # 碎片：裁剪到图案外接正方形，生成多尺度、多角度模板
+        points = cv2.findNonZero(foreground_mask(gray))
+        if points is not None:
+            x, y, w, h = cv2.boundingRect(points)
+            side = max(w, h)
+            cx, cy = x + w / 2, y + h / 2
+            x1, y1 = max(0, int(cx - side / 2)), max(0, int(cy - side / 2))
+            gray = gray[y1:y1 + side, x1:x1 + side]
+        base = cv2.resize(gray, (self.SIZE, self.SIZE), interpolation=cv2.INTER_AREA)
+        
+        templates = []
+        center = (self.SIZE / 2, self.SIZE / 2)
+        for angle in self.ANGLES:
+            rotated = cv2.warpAffine(
+                base, cv2.getRotationMatrix2D(center, angle, 1.0), (self.SIZE, self.SIZE),
+                borderMode=cv2.BORDER_REPLICATE
+            )
+            for scale in self.SCALES:
+                size = int(self.SIZE * scale)
+                templates.append(self._edges(cv2.resize(rotated, (size, size), interpolation=cv2.INTER_AREA)))
+        return templates
+    
+    def score(self, sprite_templates: List[np.ndarray], region_edges: List[np.ndarray]) -> float:
+        if not sprite_templates or not region_edges:
+            return 0.0
+        region = region_edges[0]
+        if not region.any():
+            return 0.0
+        best = 0.0
+        for template in sprite_templates:
+            if not template.any():
+                continue
+            best = max(best, float(cv2.matchTemplate(region, template, cv2.TM_CCOEFF_NORMED).max()))
+        return min(max(best, 0.0), 1.0)
+
+
+class ShapeScorer:
+    """轮廓形状相似度：比较前景掩码的 Hu 不变矩（对旋转、缩放不敏感）"""
+    
+    name = "shape"
+    calibration = (40.0, 0.93)
+    
+    SIZE = 64
+    
+    def features(self, img: np.ndarray, role: str = "") -> Optional[np.ndarray]:
+        if img is None or img.size == 0:
+            return None
+        mask = foreground_mask(cv2.resize(to_gray(img), (self.SIZE, self.SIZE), interpolation=cv2.INTER_AREA))
+        return mask if mask.any() else None
+    
+    def score(self, mask1: Optional[np.ndarray], mask2: Optional[np.ndarray]) -> float:
+        if mask1 is None or mask2 is None:
+            return 0.0
+        distance = cv2.matchShapes(mask1, mask2, cv2.CONTOURS_MATCH_I2, 0)
+        return 1.0 / (1.0 + distance)
+
+
+# 可用的评分器（名称 -> 类），通过 matcher_weights 配置启用与加权
+SCORERS = {
+    KeypointScorer.name: KeypointScorer,
+    EdgeTemplateScorer.name: EdgeTemplateScorer,
+    ShapeScorer.name: ShapeScorer,
+}
+
+DEFAULT_MATCHER_WEIGHTS = {"keypoint": 1.0, "edge": 1.0, "shape": 0.5}
+
+
+def calibrate(scores: np.ndarray, calibration: Tuple[float, float]) -> np.ndarray:
+    """将评分器原始得分映射为 0~1 的匹配置信度（logistic）"""
+    slope, center = calibration
+    return 1.0 / (1.0 + np.exp(-slope * (scores - center)))
+
+
+class SpriteMatcher:
+    """
+    碎片匹配器（多评分器集成）
+    
+    每个评分器对 碎片×区域 计算原始得分，经各自的校准曲线映射为置信度后按权重融合；
+    每次尝试碎片与区域特征只提取一次。
+    """
+    
+    def __init__(self, ratio: float = 0.8, weights: Optional[dict] = None):
+        self.keypoint = KeypointScorer(ratio)
+        self.weights = {}
+        self.scorers = []
+        for name, weight in (weights or DEFAULT_MATCHER_WEIGHTS).items():
+            if name not in SCORERS:
+                logger.warning(f"⚠️  未知的匹配评分器: {name}")
+                continue
+            if weight <= 0:
+                continue
+            self.weights[name] = float(weight)
+            self.scorers.append(self.keypoint if name == KeypointScorer.name else SCORERS[name]())
+        if not self.scorers:
+            self.weights = {KeypointScorer.name: 1.0}
+            self.scorers = [self.keypoint]
+        
+        self.timings = {}
+        self.extractions = 0
+        self.last_scores = {}
+    
+    @classmethod
+    def from_config(cls, config: dict) -> "SpriteMatcher":
+        """按配置创建匹配器"""
+        return cls(weights=config.get("matcher_weights") or DEFAULT_MATCHER_WEIGHTS)
+    
+    def similarity_matrix(self, sprites: List[np.ndarray], regions: List[np.ndarray]) -> List[List[float]]:
+        """计算 碎片×区域 融合相似度矩阵"""
+        self.extractions = 0
+        self.timings = {}
+        self.last_scores = {}
+        
+        fused = np.zeros((len(sprites), len(regions)), dtype=np.float64)
+        total_weight = sum(self.weights.values())
+        for scorer in self.scorers:
+            start = time.perf_counter()
+            sprite_features = [scorer.features(img, "sprite") for img in sprites]
+            region_features = [scorer.features(img, "region") for img in regions]
+            self.extractions += len(sprites) + len(regions)
+            self.timings[f"{scorer.name}_features"] = time.perf_counter() - start
+            
+            start = time.perf_counter()
+            raw = np.zeros_like(fused)
+            for j, f1 in enumerate(sprite_features):
+                for i, f2 in enumerate(region_features):
+                    try:
+                        raw[j, i] = scorer.score(f1, f2)
+                    except cv2.error as e:
+                        logger.error(f"相似度计算失败（{scorer.name}）: {e}")
+            self.timings[f"{scorer.name}_scoring"] = time.perf_counter() - start
+            
+            self.last_scores[scorer.name] = raw
+            fused += self.weights[scorer.name] / total_weight * calibrate(raw, scorer.calibration)
+        
+        return fused.tolist()
+    
+    def format_timings(self) -> str:
+        """格式化各阶段耗时"""
+        parts = [
+            f"{scorer.name} {(self.timings.get(f'{scorer.name}_features', 0) + self.timings.get(f'{scorer.name}_scoring', 0)) * 1000:.1f}ms"
+            for scorer in self.scorers
+        ]
+        return f"匹配耗时: {', '.join(parts)}（特征提取 {self.extractions} 次）"
+
+
+def wait_captcha_result(ctx, timeout: float) -> str:
+    """等待 tcOperation 显示验证结果，返回其 class"""
+    def result_class(driver):
+        try:
+            cls = driver.find_element(By.ID, "tcOperation").get_attribute("class") or ""
+        except (NoSuchElementException, StaleElementReferenceException):
+            return False
+        return cls if any(flag in cls for flag in RESULT_CLASSES) else False
+    
+    try:
+        return WebDriverWait(ctx.driver, timeout, poll_frequency=0.2).until(result_class)
+    except TimeoutException:
+        # 超时后按当前状态判断
+        result_el = ctx.wait.until(
+            EC.visibility_of_element_located((By.ID, "tcOperation"))
+        )
+        return result_el.get_attribute("class") or ""
 
 
 def refresh_captcha(ctx) -> bool:
-    """刷新验证码"""
+    """刷新验证码（等待背景图更换）"""
+    timeout = ctx.config.get("captcha_refresh_timeout", 10)
     try:
-        reload_btn = ctx.driver.find_element(By.ID, "reload")
-        time.sleep(2)
+        old_url = get_background_url(ctx.driver)
+        reload_btn = WebDriverWait(ctx.driver, timeout).until(
+            EC.element_to_be_clickable((By.ID, "reload"))
+        )
         reload_btn.click()
-        time.sleep(2)
+        
+        try:
+            WebDriverWait(ctx.driver, timeout, poll_frequency=0.2).until(
+                lambda d: get_background_url(d) not in ("", old_url)
+            )
+        except TimeoutException:
+            logger.warning("⚠️  验证码背景图未更换，继续重试")
+        
         logger.info("✅ 验证码已刷新")
         return True
-    except NoSuchElementException:
+    except TimeoutException:
         logger.error("❌ 验证码刷新按钮未找到")
         return False
     except Exception as e:
@@ -366,19 +973,19 @@ def refresh_captcha(ctx) -> bool:
         return False
 
 
-def clear_temp_dir(temp_dir: str):
-    """清空临时目录"""
-    if not os.path.exists(temp_dir):
-        os.makedirs(temp_dir, exist_ok=True)
-        return
-    
-    for filename in os.listdir(temp_dir):
-        file_path = os.path.join(temp_dir, filename)
-        try:
-            if os.path.isfile(file_path):
-                os.remove(file_path)
-        except Exception:
-            pass
+def get_background_url(driver) -> str:
+    """读取当前验证码背景图 URL，未加载时返回空字符串"""
+    try:
+        return get_url_from_style(driver.find_element(By.ID, "slideBg").get_attribute("style"))
+    except (NoSuchElementException, StaleElementReferenceException, ValueError):
+        return ""
+
+
+def to_gray(img: np.ndarray) -> np.ndarray:
+    """转换为灰度图"""
+    if img.ndim == 3:
+        return cv2.cvtColor(img, cv2.COLOR_BGR2GRAY)
+    return img
 
 
 def get_url_from_style(style: str) -> str:
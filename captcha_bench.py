@@ -0,0 +1,253 @@
+"""
+验证码识别离线基准测试
+
+在本地生成合成的点选验证码（背景图 + 三联碎片图），执行与线上相同的
+碎片校验 → 图案检测 → 特征匹配 → 答案校验流程，输出 JSON 格式的
+识别率、各阶段耗时（中位数 / P95）与内存峰值，用于调参时回归对比。
+
+用法:
+    python3 captcha_bench.py --count 50 --seed 1 --output bench.json
+    python3 captcha_bench.py --oracle        # 使用真实框并跳过 OCR，仅测匹配
+    python3 captcha_bench.py --config '{"match_confidence_threshold": 0.3}'
+"""
+import argparse
+import json
+import logging
+import resource
+import sys
+import time
+import tracemalloc
+from dataclasses import dataclass
+from types import SimpleNamespace
+from typing import Dict, List
+
+import cv2
+import numpy as np
+
+from captcha import CaptchaImages, CaptchaRetryableError, SpriteMatcher, encode_image, solve_captcha
+from config import CONFIG
+
+logger = logging.getLogger(__name__)
+
+BG_WIDTH, BG_HEIGHT = 672, 480
+ICON_SIZE = 64
+
+
+@dataclass
+class Fixture:
+    """合成验证码样本"""
+    images: CaptchaImages
+    bboxes: List[List[int]]  # 所有图案的真实框
+    targets: List[int]  # 三个碎片依次对应的图案下标
+
+
+def _random_icon(rng: np.random.Generator) -> np.ndarray:
+    """生成随机图案掩码（多边形 + 线条 + 圆点）"""
+    icon = np.zeros((ICON_SIZE, ICON_SIZE), dtype=np.uint8)
+    n_points = int(rng.integers(3, 7))
+    points = rng.integers(6, ICON_SIZE - 6, size=(n_points, 2)).astype(np.int32)
+    cv2.fillPoly(icon, [points], 255)
+    for _ in range(int(rng.integers(1, 4))):
+        p1 = tuple(int(v) for v in rng.integers(4, ICON_SIZE - 4, size=2))
+        p2 = tuple(int(v) for v in rng.integers(4, ICON_SIZE - 4, size=2))
+        cv2.line(icon, p1, p2, 255, int(rng.integers(2, 5)))
+    center = tuple(int(v) for v in rng.integers(12, ICON_SIZE - 12, size=2))
+    cv2.circle(icon, center, int(rng.integers(3, 8)), 0, -1)
+    return icon
+
+
+def _transform(icon: np.ndarray, rng: np.random.Generator) -> np.ndarray:
+    """随机旋转与缩放"""
+    angle = float(rng.uniform(-30, 30))
+    scale = float(rng.uniform(0.8, 1.3))
+    size = int(ICON_SIZE * scale)
+    matrix = cv2.getRotationMatrix2D((ICON_SIZE / 2, ICON_SIZE / 2), angle, scale)
+    matrix[0, 2] += (size - ICON_SIZE) / 2
+    matrix[1, 2] += (size - ICON_SIZE) / 2
+    return cv2.warpAffine(icon, matrix, (size, size))
+
+
+def _background(rng: np.random.Generator) -> np.ndarray:
+    """渐变 + 色块 + 噪声背景"""
+    gradient = np.linspace(0, 1, BG_WIDTH, dtype=np.float32)[None, :, None]
+    c1 = rng.uniform(60, 200, size=3).astype(np.float32)
+    c2 = rng.uniform(60, 200, size=3).astype(np.float32)
+    bg = np.broadcast_to(c1 * (1 - gradient) + c2 * gradient, (BG_HEIGHT, BG_WIDTH, 3)).copy()
+    for _ in range(8):
+        center = (int(rng.integers(0, BG_WIDTH)), int(rng.integers(0, BG_HEIGHT)))
+        axes = (int(rng.integers(30, 120)), int(rng.integers(20, 80)))
+        color = tuple(float(v) for v in rng.uniform(40, 220, size=3))
+        cv2.ellipse(bg, center, axes, float(rng.uniform(0, 180)), 0, 360, color, -1)
+    bg = cv2.GaussianBlur(bg, (0, 0), 9)
+    bg += rng.normal(0, 6, size=bg.shape).astype(np.float32)
+    return np.clip(bg, 0, 255).astype(np.uint8)
+
+
+def _place(bg: np.ndarray, mask: np.ndarray, taken: List[List[int]], rng: np.random.Generator) -> List[int]:
+    """将图案贴到背景上不重叠的位置，返回真实框"""
+    h, w = mask.shape
+    for _ in range(100):
+        x1 = int(rng.integers(10, BG_WIDTH - w - 10))
+        y1 = int(rng.integers(10, BG_HEIGHT - h - 10))
+        box = [x1, y1, x1 + w, y1 + h]
+        if all(box[2] < t[0] or box[0] > t[2] or box[3] < t[1] or box[1] > t[3] for t in taken):
+            break
+    # 与碎片图同为深色图案，保持明暗极性一致
+    color = rng.uniform(0, 50, size=3)
+    region = bg[box[1]:box[3], box[0]:box[2]].astype(np.float32)
+    alpha = (mask.astype(np.float32) / 255)[..., None]
+    bg[box[1]:box[3], box[0]:box[2]] = (region * (1 - alpha) + color * alpha).astype(np.uint8)
+    return box
+
+
+def generate_fixture(rng: np.random.Generator, n_icons: int = 4) -> Fixture:
+    """生成一个合成验证码样本"""
+    icons = [_random_icon(rng) for _ in range(n_icons)]
+    bg = _background(rng)
+    
+    bboxes = []
+    for icon in icons:
+        bboxes.append(_place(bg, _transform(icon, rng), bboxes, rng))
+    
+    # 碎片图：三个目标图案黑色绘制在白底上
+    targets = [int(i) for i in rng.permutation(n_icons)[:3]]
+    sprite = np.full((ICON_SIZE, ICON_SIZE * 3, 3), 255, dtype=np.uint8)
+    for slot, target in enumerate(targets):
+        sprite[:, slot * ICON_SIZE:(slot + 1) * ICON_SIZE][icons[target] > 0] = 0
+    
+    images = CaptchaImages(
+        background_bytes=encode_image(bg),
+        sprite_bytes=encode_image(sprite),
+        background=bg,
+        sprite=sprite
+    )
+    return Fixture(images=images, bboxes=bboxes, targets=targets)
+
+
+class OracleDetector:
+    """直接返回真实框的检测器（--oracle 模式）"""
+    
+    def __init__(self):
+        self.bboxes = []
+    
+    def detection(self, img):
+        return self.bboxes
+
+
+class OracleOcr:
+    """跳过碎片 OCR 校验（--oracle 模式）"""
+    
+    def classification(self, img, **kwargs):
+        return ""
+
+
+def _is_solved(result: dict, fixture: Fixture) -> bool:
+    """点击位置是否都落在对应图案的真实框内"""
+    for j, target in enumerate(fixture.targets):
+        x, y = map(int, result[f"sprite_{j+1}.position"].split(","))
+        x1, y1, x2, y2 = fixture.bboxes[target]
+        if not (x1 <= x <= x2 and y1 <= y <= y2):
+            return False
+    return True
+
+
+def summarize(values: List[float]) -> Dict[str, float]:
+    """耗时统计（毫秒）"""
+    if not values:
+        return {"count": 0, "median_ms": 0.0, "p95_ms": 0.0}
+    arr = np.asarray(values) * 1000
+    return {
+        "count": len(values),
+        "median_ms": round(float(np.median(arr)), 3),
+        "p95_ms": round(float(np.percentile(arr, 95)), 3),
+    }
+
+
+def run_benchmark(count: int, seed: int, oracle: bool, config: dict) -> dict:
+    """执行基准测试并返回结果"""
+    rng = np.random.default_rng(seed)
+    fixtures = [generate_fixture(rng) for _ in range(count)]
+    
+    if oracle:
+        ctx = SimpleNamespace(ocr=OracleOcr(), det=OracleDetector(), config=config, debug_dir=None)
+    else:
+        from model_registry import MODELS
+        MODELS.configure(config)
+        ctx = SimpleNamespace(ocr=MODELS.ocr, det=MODELS.det, config=config, debug_dir=None)
+    
+    matcher = SpriteMatcher.from_config(config)
+    stage_times: Dict[str, List[float]] = {}
+    failures: Dict[str, int] = {}
+    solved = 0
+    
+    tracemalloc.start()
+    for fixture in fixtures:
+        if oracle:
+            ctx.det.bboxes = fixture.bboxes
+        
+        timings = {}
+        start = time.perf_counter()
+        try:
+            result, _ = solve_captcha(ctx, fixture.images, matcher, config, timings=timings)
+            if _is_solved(result, fixture):
+                solved += 1
+            else:
+                failures["点击位置错误"] = failures.get("点击位置错误", 0) + 1
+        except CaptchaRetryableError as e:
+            failures[str(e)] = failures.get(str(e), 0) + 1
+        timings["total"] = time.perf_counter() - start
+        
+        for stage, elapsed in timings.items():
+            stage_times.setdefault(stage, []).append(elapsed)
+        if "match" in timings:
+            for stage, elapsed in matcher.timings.items():
+                stage_times.setdefault(f"match.{stage}", []).append(elapsed)
+    _, peak_traced = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    
+    return {
+        "fixtures": count,
+        "seed": seed,
+        "oracle": oracle,
+        "match_confidence_threshold": config["match_confidence_threshold"],
+        "solve_rate": round(solved / count, 4) if count else 0.0,
+        "solved": solved,
+        "failures": failures,
+        "stages": {stage: summarize(values) for stage, values in stage_times.items()},
+        "memory": {
+            "peak_traced_mb": round(peak_traced / 1024 / 1024, 2),
+            "max_rss_mb": round(resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024, 2),
+        },
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description="验证码识别离线基准测试")
+    parser.add_argument("--count", type=int, default=50, help="样本数量")
+    parser.add_argument("--seed", type=int, default=0, help="随机种子")
+    parser.add_argument("--oracle", action="store_true", help="使用真实框并跳过 OCR 校验，仅测试匹配")
+    parser.add_argument("--config", default="{}", help="覆盖配置（JSON）")
+    parser.add_argument("--output", help="结果输出文件（默认输出到标准输出）")
+    parser.add_argument("--verbose", action="store_true", help="输出识别流程日志")
+    args = parser.parse_args()
+    
+    logging.basicConfig(
+        level=logging.INFO if args.verbose else logging.WARNING,
+        format='%(asctime)s - %(levelname)s - %(message)s',
+        handlers=[logging.StreamHandler(sys.stderr)]
+    )
+    
+    config = dict(CONFIG.config)
+    config.update(json.loads(args.config))
+    
+    report = run_benchmark(args.count, args.seed, args.oracle, config)
+    output = json.dumps(report, ensure_ascii=False, indent=2)
+    if args.output:
+        with open(args.output, "w", encoding="utf-8") as f:
+            f.write(output + "\n")
+    else:
+        print(output)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,115 @@
+import json
+import logging
+import os
+import sqlite3
+import threading
+import time
+from typing import Dict, Optional
+
+import cv2
+import numpy as np
+
+logger = logging.getLogger(__name__)
+
+# 同一路径的缓存在进程内共享一个实例
+_caches: Dict[str, "CaptchaCache"] = {}
+_caches_lock = threading.Lock()
+
+
+def image_hash(image: np.ndarray) -> str:
+    """差值哈希（dHash，64 位），对重新编码、轻微缩放不敏感"""
+    if image.ndim == 3:
+        image = cv2.cvtColor(image, cv2.COLOR_BGR2GRAY)
+    small = cv2.resize(image, (9, 8), interpolation=cv2.INTER_AREA)
+    bits = (small[:, 1:] > small[:, :-1]).flatten()
+    return f"{int(''.join('1' if b else '0' for b in bits), 2):016x}"
+
+
+class CaptchaCache:
+    """
+    验证码识别缓存（SQLite，按最近使用淘汰）
+    
+    - bbox:<背景哈希>：图案检测结果
+    - solution:<背景哈希>:<碎片哈希>：验证通过（show-success）的点击答案
+    """
+    
+    def __init__(self, path: str, max_entries: int):
+        self.path = path
+        self.max_entries = max_entries
+        self._lock = threading.Lock()
+        self._conn: Optional[sqlite3.Connection] = None
+    
+    @classmethod
+    def from_config(cls, config: dict) -> Optional["CaptchaCache"]:
+        """按配置获取缓存，captcha_cache_size 为 0 时返回 None"""
+        max_entries = int(config.get("captcha_cache_size", 2000))
+        if max_entries <= 0:
+            return None
+        
+        # 相对路径以主脚本目录为基准
+        script_dir = os.path.dirname(os.path.abspath(__file__))
+        path = os.path.abspath(
+            os.path.join(script_dir, config.get("captcha_cache_path", "./captcha_cache.sqlite3"))
+        )
+        with _caches_lock:
+            cache = _caches.get(path)
+            if cache is None:
+                cache = _caches[path] = cls(path, max_entries)
+            return cache
+    
+    def _connect(self) -> sqlite3.Connection:
+        """打开数据库（调用方持有锁）"""
+        if self._conn is None:
+            os.makedirs(os.path.dirname(self.path), exist_ok=True)
+            self._conn = sqlite3.connect(self.path, timeout=10, check_same_thread=False)
+            self._conn.execute(
+                "CREATE TABLE IF NOT EXISTS entries ("
+                "key TEXT PRIMARY KEY, value TEXT NOT NULL, hits INTEGER NOT NULL DEFAULT 0, last_used REAL NOT NULL)"
+            )
+            self._conn.commit()
+        return self._conn
+    
+    def get(self, key: str):
+        """读取缓存并刷新最近使用时间，未命中或出错时返回 None"""
+        with self._lock:
+            try:
+                conn = self._connect()
+                row = conn.execute("SELECT value FROM entries WHERE key = ?", (key,)).fetchone()
+                if row is None:
+                    return None
+                conn.execute(
+                    "UPDATE entries SET hits = hits + 1, last_used = ? WHERE key = ?", (time.time(), key)
+                )
+                conn.commit()
+                return json.loads(row[0])
+            except (sqlite3.Error, ValueError) as e:
+                logger.warning(f"⚠️  验证码缓存读取失败: {e}")
+                return None
+    
+    def put(self, key: str, value):
+        """写入缓存，超出容量时淘汰最久未使用的条目"""
+        with self._lock:
+            try:
+                conn = self._connect()
+                conn.execute(
+                    "INSERT OR REPLACE INTO entries (key, value, hits, last_used) VALUES (?, ?, 0, ?)",
+                    (key, json.dumps(value, default=float), time.time())
+                )
+                conn.execute(
+                    "DELETE FROM entries WHERE key NOT IN "
+                    "(SELECT key FROM entries ORDER BY last_used DESC LIMIT ?)",
+                    (self.max_entries,)
+                )
+                conn.commit()
+            except sqlite3.Error as e:
+                logger.warning(f"⚠️  验证码缓存写入失败: {e}")
+    
+    def delete(self, key: str):
+        """删除缓存条目（如缓存的答案验证失败）"""
+        with self._lock:
+            try:
+                conn = self._connect()
+                conn.execute("DELETE FROM entries WHERE key = ?", (key,))
+                conn.commit()
+            except sqlite3.Error as e:
+                logger.warning(f"⚠️  验证码缓存删除失败: {e}")
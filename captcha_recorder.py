@@ -0,0 +1,115 @@
+import json
+import logging
+import os
+import threading
+import time
+import zipfile
+from typing import Dict, Iterator, Optional, Tuple
+
+logger = logging.getLogger(__name__)
+
+# 同一路径的记录器在进程内共享一个实例（并发账号写同一归档）
+_recorders: Dict[str, "CaptchaRecorder"] = {}
+_recorders_lock = threading.Lock()
+
+
+class CaptchaRecorder:
+    """
+    验证码尝试记录器（默认关闭）
+    
+    每次尝试追加到 zip 归档中的一个目录：
+        <序号>/meta.json       检测框、相似度矩阵、答案、点击位置、显示尺寸、验证结果等
+        <序号>/background.img  背景图原始字节
+        <序号>/sprite.img      碎片图原始字节
+    zip 中央目录即为索引；归档超过上限时轮转为 .1、.2 …
+    """
+    
+    def __init__(self, path: str, max_bytes: int, keep: int):
+        self.path = path
+        self.max_bytes = max_bytes
+        self.keep = max(0, keep)
+        self._lock = threading.Lock()
+    
+    @classmethod
+    def from_config(cls, config: dict) -> Optional["CaptchaRecorder"]:
+        """按配置获取记录器，captcha_record_path 为空时返回 None"""
+        if not config.get("captcha_record_path"):
+            return None
+        
+        # 相对路径以主脚本目录为基准
+        script_dir = os.path.dirname(os.path.abspath(__file__))
+        path = os.path.abspath(os.path.join(script_dir, config["captcha_record_path"]))
+        with _recorders_lock:
+            recorder = _recorders.get(path)
+            if recorder is None:
+                recorder = _recorders[path] = cls(
+                    path,
+                    int(float(config.get("captcha_record_max_mb", 50)) * 1024 * 1024),
+                    int(config.get("captcha_record_keep", 3))
+                )
+            return recorder
+    
+    def record(self, meta: dict, background: bytes, sprite: bytes):
+        """追加一次尝试（记录失败不影响验证码流程）"""
+        with self._lock:
+            try:
+                self._rotate()
+                os.makedirs(os.path.dirname(self.path), exist_ok=True)
+                self._check_archive()
+                self._append(meta, background, sprite)
+            except (OSError, zipfile.BadZipFile) as e:
+                logger.warning(f"⚠️  验证码记录写入失败: {e}")
+    
+    def _check_archive(self):
+        """
+        归档损坏时（如进程被杀时写了一半）移到一旁，之后写入新归档（调用方持有锁）
+        
+        zipfile 的追加模式遇到损坏的归档会把新内容接在损坏数据之后，
+        导致序号重复且新记录无法读取，因此需要先以只读方式校验。
+        """
+        if not os.path.exists(self.path):
+            return
+        try:
+            with zipfile.ZipFile(self.path):
+                pass
+        except zipfile.BadZipFile as e:
+            corrupt_path = f"{self.path}.corrupt-{time.strftime('%Y%m%d%H%M%S')}"
+            os.replace(self.path, corrupt_path)
+            logger.warning(f"⚠️  验证码记录归档已损坏（{e}），已移至 {corrupt_path}")
+    
+    def _append(self, meta: dict, background: bytes, sprite: bytes):
+        """向归档追加一次尝试（调用方持有锁）"""
+        with zipfile.ZipFile(self.path, "a", compression=zipfile.ZIP_DEFLATED) as archive:
+            entry_id = f"{len(archive.namelist()) // 3:06d}"
+            meta = {**meta, "id": entry_id, "recorded_at": time.time()}
+            archive.writestr(f"{entry_id}/meta.json", json.dumps(meta, ensure_ascii=False, default=float))
+            # 图片已是压缩格式，直接存储
+            archive.writestr(f"{entry_id}/background.img", background, compress_type=zipfile.ZIP_STORED)
+            archive.writestr(f"{entry_id}/sprite.img", sprite, compress_type=zipfile.ZIP_STORED)
+    
+    def _rotate(self):
+        """归档超过上限时轮转（调用方持有锁）"""
+        if not os.path.exists(self.path) or os.path.getsize(self.path) < self.max_bytes:
+            return
+        
+        if self.keep == 0:
+            os.remove(self.path)
+            return
+        for i in range(self.keep - 1, 0, -1):
+            older = f"{self.path}.{i}"
+            if os.path.exists(older):
+                os.replace(older, f"{self.path}.{i + 1}")
+        os.replace(self.path, f"{self.path}.1")
+        logger.info(f"🗂️  验证码记录已轮转: {self.path}.1")
+
+
+def read_archive(path: str) -> Iterator[Tuple[dict, bytes, bytes]]:
+    """按写入顺序读取归档中的尝试记录：(meta, 背景图字节, 碎片图字节)"""
+    with zipfile.ZipFile(path) as archive:
+        names = set(archive.namelist())
+        for name in sorted(n for n in names if n.endswith("/meta.json")):
+            prefix = name[:-len("meta.json")]
+            if f"{prefix}background.img" not in names or f"{prefix}sprite.img" not in names:
+                continue
+            meta = json.loads(archive.read(name))
+            yield meta, archive.read(f"{prefix}background.img"), archive.read(f"{prefix}sprite.img")
@@ -0,0 +1,146 @@
+"""
+验证码记录离线重放
+
+读取 CaptchaRecorder 写出的归档，用当前的识别流程重新求解每次真实尝试，
+输出 JSON 格式的对比结果：已验证通过的尝试中答案仍正确的比例、
+原本失败的尝试中答案发生变化的数量，以及各阶段耗时（中位数 / P95）。
+
+用法:
+    python3 captcha_replay.py captcha_records.zip
+    python3 captcha_replay.py captcha_records.zip captcha_records.zip.1 --detect
+    python3 captcha_replay.py captcha_records.zip --config '{"matcher_weights": {"keypoint": 1}}'
+"""
+import argparse
+import json
+import logging
+import sys
+import time
+from types import SimpleNamespace
+from typing import Dict, List, Optional
+
+from captcha import CaptchaImages, CaptchaRetryableError, SpriteMatcher, decode_image, solve_captcha
+from captcha_bench import OracleDetector, OracleOcr, summarize
+from captcha_recorder import read_archive
+from config import CONFIG
+
+logger = logging.getLogger(__name__)
+
+
+def _answer_regions(answer: dict, bboxes: List[List[int]]) -> Optional[List[int]]:
+    """答案中每个碎片的点击位置落在哪个检测框内（无法对应时返回 None）"""
+    regions = []
+    for j in range(3):
+        position = answer.get(f"sprite_{j+1}.position")
+        if not position:
+            return None
+        x, y = map(int, position.split(","))
+        hit = next((i for i, (x1, y1, x2, y2) in enumerate(bboxes) if x1 <= x <= x2 and y1 <= y <= y2), None)
+        if hit is None:
+            return None
+        regions.append(hit)
+    return regions
+
+
+def _same_answer(old: dict, new: dict, bboxes: List[List[int]]) -> bool:
+    """两次答案是否点击了相同的图案"""
+    old_regions = _answer_regions(old, bboxes)
+    return old_regions is not None and old_regions == _answer_regions(new, bboxes)
+
+
+def replay(paths: List[str], config: dict, detect: bool, skip_ocr: bool) -> dict:
+    """重放归档并返回结果"""
+    from model_registry import MODELS
+    MODELS.configure(config)
+    
+    detector = OracleDetector()
+    ctx = SimpleNamespace(
+        ocr=OracleOcr() if skip_ocr else MODELS.ocr,
+        det=MODELS.det if detect else detector,
+        config=config,
+        debug_dir=None
+    )
+    matcher = SpriteMatcher.from_config(config)
+    
+    stage_times: Dict[str, List[float]] = {}
+    failures: Dict[str, int] = {}
+    counts = {"attempts": 0, "skipped": 0, "success": 0, "success_kept": 0, "failed": 0, "failed_changed": 0}
+    
+    for path in paths:
+        for meta, background_bytes, sprite_bytes in read_archive(path):
+            background = decode_image(background_bytes)
+            sprite = decode_image(sprite_bytes)
+            recorded_bboxes = meta.get("bboxes")
+            if background is None or sprite is None or (not detect and not recorded_bboxes):
+                counts["skipped"] += 1
+                continue
+            
+            counts["attempts"] += 1
+            detector.bboxes = recorded_bboxes or []
+            images = CaptchaImages(background_bytes, sprite_bytes, background, sprite)
+            
+            timings = {}
+            start = time.perf_counter()
+            answer = None
+            try:
+                answer, _ = solve_captcha(ctx, images, matcher, config, timings=timings)
+            except CaptchaRetryableError as e:
+                failures[str(e)] = failures.get(str(e), 0) + 1
+            timings["total"] = time.perf_counter() - start
+            for stage, elapsed in timings.items():
+                stage_times.setdefault(stage, []).append(elapsed)
+            
+            old_answer = meta.get("answer")
+            if not old_answer or not recorded_bboxes:
+                continue
+            if meta.get("outcome") == "success":
+                counts["success"] += 1
+                if answer and _same_answer(old_answer, answer, recorded_bboxes):
+                    counts["success_kept"] += 1
+            elif meta.get("result_class"):
+                # 仅统计已提交并被判定失败的尝试
+                counts["failed"] += 1
+                if answer and not _same_answer(old_answer, answer, recorded_bboxes):
+                    counts["failed_changed"] += 1
+    
+    return {
+        "archives": paths,
+        "detect": detect,
+        "skip_ocr": skip_ocr,
+        "match_confidence_threshold": config["match_confidence_threshold"],
+        **counts,
+        "success_kept_rate": round(counts["success_kept"] / counts["success"], 4) if counts["success"] else None,
+        "failures": failures,
+        "stages": {stage: summarize(values) for stage, values in stage_times.items()},
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description="验证码记录离线重放")
+    parser.add_argument("archives", nargs="+", help="验证码记录归档（captcha_record_path 及其轮转文件）")
+    parser.add_argument("--detect", action="store_true", help="重新执行图案检测（默认使用记录的检测框）")
+    parser.add_argument("--skip-ocr", action="store_true", help="跳过碎片 OCR 校验")
+    parser.add_argument("--config", default="{}", help="覆盖配置（JSON）")
+    parser.add_argument("--output", help="结果输出文件（默认输出到标准输出）")
+    parser.add_argument("--verbose", action="store_true", help="输出识别流程日志")
+    args = parser.parse_args()
+    
+    logging.basicConfig(
+        level=logging.INFO if args.verbose else logging.WARNING,
+        format='%(asctime)s - %(levelname)s - %(message)s',
+        handlers=[logging.StreamHandler(sys.stderr)]
+    )
+    
+    config = dict(CONFIG.config)
+    config.update(json.loads(args.config))
+    
+    report = replay(args.archives, config, args.detect, args.skip_ocr)
+    output = json.dumps(report, ensure_ascii=False, indent=2)
+    if args.output:
+        with open(args.output, "w", encoding="utf-8") as f:
+            f.write(output + "\n")
+    else:
+        print(output)
+
+
+if __name__ == "__main__":
+    main()
@@ -12,13 +12,54 @@ class Config:
     DEFAULT_CONFIG = {
         # 基础配置
         "timeout": 20,
-        "max_delay": 5,
-        "similarity_threshold": 0.4,
+        "max_delay": 5,  # 账号随机启动时间窗口（分钟，额外加 1 分钟）
+        "account_min_gap": 3,  # 相邻账号启动的最小间隔（秒）
+        "similarity_threshold": 0.4,  # 已弃用：旧版 SIFT 匹配率阈值，不再生效
+        "match_confidence_threshold": 0.4,  # 融合匹配置信度下限（0-1）
+        "max_parallel_browsers": 1,  # 同时运行的浏览器数量，1 表示串行
+        
+        # 浏览器配置
+        "reuse_browser": True,  # 复用同一 Chrome，每个账号使用独立浏览器上下文
+        "window_size": "1920,1080",  # 视口尺寸，调小可降低渲染开销
+        "renderer_process_limit": 0,  # 渲染进程上限，0 表示使用 Chrome 默认值
+        "block_resources": True,  # 拦截字体、媒体、统计脚本及站点装饰图片（不影响验证码图片）
+        "blocked_url_patterns": [],  # 追加的拦截规则（Network.setBlockedURLs 通配符）
         
         # 验证码配置
         "captcha_retry_limit": 10,  # -1表示无限重试
+        "captcha_debug_dir": "",  # 非空时保存每次尝试的验证码图片，便于排查
+        "matcher_weights": {"keypoint": 1.0, "edge": 1.0, "shape": 0.5},  # 匹配评分器权重，0 表示禁用
+        "captcha_cache_size": 2000,  # 验证码识别缓存条目上限，0 表示禁用
+        "captcha_cache_path": "./captcha_cache.sqlite3",
+        "captcha_record_path": "",  # 非空时将每次尝试追加到 zip 归档，供 captcha_replay.py 离线重放
+        "captcha_record_max_mb": 50,  # 单个归档上限，超过后轮转
+        "captcha_record_keep": 3,  # 保留的轮转归档数量
+        
+        # 模型推理配置（onnxruntime）
+        "onnx_intra_op_threads": 0,  # 单个算子内的线程数，0 表示 onnxruntime 默认（全部核心）
+        "onnx_inter_op_threads": 0,  # 算子间并行线程数（parallel 模式生效），0 表示默认
+        "onnx_execution_mode": "sequential",  # sequential 或 parallel
+        "model_warmup": True,  # 加载模型后用内置图片预热一次
+        
+        # 等待配置（事件驱动等待的超时上限，秒）
+        "login_redirect_timeout": 15,  # 登录后等待跳转控制台
+        "captcha_appear_timeout": 10,  # 点击签到后等待验证码弹出
+        "captcha_result_timeout": 10,  # 提交验证码后等待结果
+        "captcha_refresh_timeout": 10,  # 刷新验证码后等待新图片
+        "sign_in_result_timeout": 10,  # 验证通过后等待签到状态更新
+        
+        # 会话配置
+        "session_persist": True,  # 加密保存登录会话，下次运行时优先复用
+        "session_dir": "./sessions",
+        "sign_in_preflight": True,  # 启动浏览器前通过 HTTP 查询签到状态，已签到则跳过
+        
+        # 运行日志配置
+        "run_journal": True,  # 按天记录账号结果，重复运行时跳过今日已成功的账号
+        "journal_dir": "./journal",
+        "journal_keep_days": 7,
         
         # 下载配置
+        "captcha_capture_mode": "browser",  # browser: 读取浏览器已加载的图片；http: 重新下载
         "download_max_retries": 3,
         "download_retry_delay": 2,
         "download_timeout": 10,
@@ -28,15 +69,22 @@ class Config:
         "api_request_timeout": 10,
         "api_max_retries": 3,
         "api_retry_delay": 2,
+        "http_pool_size": 16,  # HTTP 连接池容量（所有账号共享）
         
         # 续费配置（全局默认值）
         "renew_days": 7,
         "renew_threshold_days": 3,
         "min_points_reserve": 5000,
+        "renew_detail_concurrency": 4,  # 并发查询服务器详情的数量
+        "server_cache_ttl_hours": 72,  # 服务器到期信息缓存有效期，0 表示禁用缓存
+        "server_cache_path": "./server_cache.json",
         
         # 其他配置
         "points_to_cny_rate": 2000,
         
+        # 运行指标（JSON 运行记录 + Prometheus textfile），为空表示不输出
+        "metrics_dir": "./metrics",
+        
         # 路径配置（相对于主脚本的路径）
         "stealth_js_path": "./stealth.min.js"  # 默认在当前目录
     }
@@ -57,8 +105,15 @@ class Config:
             # 打印关键配置
             logger.info(f"⚙️  页面超时: {merged_config['timeout']}秒")
             logger.info(f"⚙️  最大延时: {merged_config['max_delay']}分钟")
+            logger.info(f"⚙️  并发浏览器: {merged_config['max_parallel_browsers']}个")
             logger.info(f"⚙️  验证码重试: {merged_config['captcha_retry_limit']} {'(无限重试)' if merged_config['captcha_retry_limit'] == -1 else '次'}")
-            logger.info(f"⚙️  相似度阈值: {merged_config['similarity_threshold']}")
+            logger.info(f"⚙️  匹配置信度阈值: {merged_config['match_confidence_threshold']}")
+            if "similarity_threshold" in user_config:
+                # 旧阈值为 SIFT 匹配率，与融合置信度含义不同，不自动迁移
+                logger.warning(
+                    "⚠️  similarity_threshold 已弃用且不再生效（旧版为 SIFT 匹配率），"
+                    "请改用 match_confidence_threshold（多评分器校准后的融合置信度）"
+                )
             logger.info(f"⚙️  续费天数: {merged_config['renew_days']}天")
             logger.info(f"⚙️  续费阈值: 剩余{merged_config['renew_threshold_days']}天时触发")
             logger.info(f"⚙️  保留积分: {merged_config['min_points_reserve']}分")
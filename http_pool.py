@@ -0,0 +1,51 @@
+import logging
+import threading
+from http.cookiejar import DefaultCookiePolicy
+
+import requests
+from requests.adapters import HTTPAdapter
+
+logger = logging.getLogger(__name__)
+
+_session = None
+_lock = threading.Lock()
+
+
+class _RejectAllCookies(DefaultCookiePolicy):
+    """拒绝写入任何 Cookie，避免响应下发的 Cookie 被带到其他账号的请求中"""
+    
+    def set_ok(self, cookie, request):
+        return False
+
+
+def get_session(pool_size: int = 16) -> requests.Session:
+    """
+    获取进程共享的 HTTP 会话（连接池 + Keep-Alive）
+    
+    所有 API 请求与图片下载共用同一连接池，避免每次请求重新建立 TCP/TLS 连接。
+    会话的 Cookie 罐拒绝保存任何 Cookie，请求头（如 API Key）与 Cookie 均按请求传入，
+    因此各账号之间只共享连接，不共享登录状态。
+    """
+    global _session
+    if _session is not None:
+        return _session
+    
+    with _lock:
+        if _session is None:
+            session = requests.Session()
+            session.cookies.set_policy(_RejectAllCookies())
+            adapter = HTTPAdapter(pool_connections=pool_size, pool_maxsize=pool_size)
+            session.mount("https://", adapter)
+            session.mount("http://", adapter)
+            _session = session
+            logger.info(f"🔌 HTTP 连接池初始化成功（容量 {pool_size}）")
+        return _session
+
+
+def close_session():
+    """关闭共享 HTTP 会话"""
+    global _session
+    with _lock:
+        if _session is not None:
+            _session.close()
+            _session = None
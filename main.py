@@ -1,26 +1,31 @@
 import logging
 import os
-import random
 import sys
 import time
 import tempfile
-import shutil
-from dataclasses import dataclass
-from typing import List, Dict
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import dataclass, fields
+from typing import List, Dict, Optional, Tuple
 
-import ddddocr
 from selenium import webdriver
 from selenium.webdriver.common.by import By
 from selenium.webdriver.support.wait import WebDriverWait
 from selenium.webdriver.support import expected_conditions as EC
-from selenium.common import TimeoutException
+from selenium.common import TimeoutException, NoSuchElementException, StaleElementReferenceException
 from selenium.webdriver.chrome.options import Options
 from selenium.webdriver.chrome.service import Service
 
 from config import CONFIG
 from account_parser import parse_accounts, Account
 from api_client import RainyunAPI
-from server_manager import ServerManager
+from notify import send_notification
+from renew import execute_auto_renew
+from model_registry import MODELS, SharedModel
+from session_store import SessionStore
+from metrics import METRICS
+from browser_pool import BROWSERS
+from scheduler import JitterSchedule, wait_until
+from run_journal import RunJournal
 
 logger = logging.getLogger(__name__)
 
@@ -31,6 +36,7 @@ class AccountResult:
     username: str
     login_success: bool = False
     sign_in_success: bool = False
+    already_signed: bool = False  # 预检查发现今日已签到，未启动浏览器
     points_before: int = 0
     points_after: int = 0
     points_earned: int = 0
@@ -40,7 +46,7 @@ class AccountResult:
     
     def is_success(self) -> bool:
         """是否成功"""
-        return self.login_success and self.sign_in_success
+        return self.already_signed or (self.login_success and self.sign_in_success)
 
 
 @dataclass
@@ -48,21 +54,23 @@ class RuntimeContext:
     """运行时上下文"""
     driver: webdriver.Chrome
     wait: WebDriverWait
-    ocr: ddddocr.DdddOcr
-    det: ddddocr.DdddOcr
-    temp_dir: str
+    ocr: SharedModel
+    det: SharedModel
     config: dict
-    
-    def temp_path(self, filename: str) -> str:
-        """获取临时文件路径"""
-        return os.path.join(self.temp_dir, filename)
+    debug_dir: Optional[str] = None  # 验证码调试目录，为空时不落盘
+    username: str = ""
 
 
 def init_logger():
     """初始化日志"""
+    # 并发模式下附带线程名，便于区分各账号日志
+    if int(CONFIG.get("max_parallel_browsers", 1)) > 1:
+        log_format = '%(asctime)s - %(levelname)s - [%(threadName)s] %(message)s'
+    else:
+        log_format = '%(asctime)s - %(levelname)s - %(message)s'
     logging.basicConfig(
         level=logging.INFO,
-        format='%(asctime)s - %(levelname)s - %(message)s',
+        format=log_format,
         handlers=[logging.StreamHandler(sys.stdout)]
     )
     logger.info("=" * 80)
@@ -78,6 +86,18 @@ def init_logger():
     logger.info("=" * 80)
 
 
+# 默认拦截的资源：字体、音视频、第三方统计，以及雨云站点自身的装饰图片
+# 验证码图片来自腾讯验证码 CDN，不受影响
+BLOCKED_URL_PATTERNS = (
+    "*.woff", "*.woff2", "*.ttf", "*.otf", "*.eot",
+    "*.mp4", "*.webm", "*.mp3", "*.ogg", "*.wav",
+    "*google-analytics.com*", "*googletagmanager.com*", "*hm.baidu.com*",
+    "*cnzz.com*", "*clarity.ms*", "*sentry.io*",
+    "*rainyun.com*.png", "*rainyun.com*.jpg", "*rainyun.com*.jpeg",
+    "*rainyun.com*.gif", "*rainyun.com*.webp", "*rainyun.com*.svg", "*rainyun.com*.ico",
+)
+
+
 def init_selenium(config: dict):
     """初始化 Selenium 驱动（青龙面板专用）"""
     logger.info("🔧 开始初始化 Selenium WebDriver")
@@ -88,10 +108,20 @@ def init_selenium(config: dict):
     ops.add_argument("--disable-dev-shm-usage")
     ops.add_argument("--headless=new")
     ops.add_argument("--disable-gpu")
-    ops.add_argument("--window-size=1920,1080")
+    window_size = str(config.get("window_size", "1920,1080")).replace("x", ",")
+    ops.add_argument(f"--window-size={window_size}")
     logger.info("   - 已配置无沙盒模式")
     logger.info("   - 已配置无头模式")
-    logger.info("   - 已配置窗口尺寸: 1920x1080")
+    logger.info(f"   - 已配置窗口尺寸: {window_size.replace(',', 'x')}")
+    
+    # 精简配置：关闭扩展、后台联网与音频，限制渲染进程数量
+    ops.add_argument("--disable-extensions")
+    ops.add_argument("--disable-background-networking")
+    ops.add_argument("--mute-audio")
+    renderer_limit = int(config.get("renderer_process_limit", 0))
+    if renderer_limit > 0:
+        ops.add_argument(f"--renderer-process-limit={renderer_limit}")
+        logger.info(f"   - 渲染进程上限: {renderer_limit}")
     
     # User-Agent
     ops.add_argument("--user-agent=Mozilla/5.0 (X11; Linux x86_64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/120.0.0.0 Safari/537.36")
@@ -123,6 +153,30 @@ def init_selenium(config: dict):
         raise
 
 
+def apply_resource_blocking(driver, config: dict):
+    """通过 CDP 拦截签到流程用不到的资源（验证码 iframe 与图片不在拦截范围内）"""
+    if not config.get("block_resources", True):
+        return
+    
+    patterns = list(BLOCKED_URL_PATTERNS) + list(config.get("blocked_url_patterns", []))
+    try:
+        driver.execute_cdp_cmd("Network.enable", {})
+        driver.execute_cdp_cmd("Network.setBlockedURLs", {"urls": patterns})
+        logger.info(f"   - 已启用资源拦截（{len(patterns)} 条规则）")
+    except Exception as e:
+        logger.warning(f"⚠️  资源拦截设置失败，按完整页面加载: {e}")
+
+
+def prepare_page(driver, config: dict):
+    """为新标签页注入反检测脚本并设置资源拦截"""
+    inject_stealth_js(driver, config)
+    apply_resource_blocking(driver, config)
+
+
+# 反检测脚本内容缓存（复用浏览器时每个账号上下文都要注入）
+_stealth_js_cache: Dict[str, str] = {}
+
+
 def inject_stealth_js(driver, config: dict):
     """注入反检测脚本（支持相对路径）"""
     # 获取主脚本所在目录
@@ -135,22 +189,25 @@ def inject_stealth_js(driver, config: dict):
     script_path = os.path.join(script_dir, relative_path)
     script_path = os.path.abspath(script_path)  # 转为绝对路径
     
-    logger.info(f"🔧 检查反检测脚本: {script_path}")
-    
-    if not os.path.exists(script_path):
-        logger.error(f"❌ 未找到 stealth.min.js！")
-        logger.error(f"预期路径: {script_path}")
-        logger.error(f"主脚本目录: {script_dir}")
-        logger.error(f"配置的相对路径: {relative_path}")
-        logger.error("请检查以下几点：")
-        logger.error("  1. 文件是否已上传")
-        logger.error("  2. 文件名是否正确（区分大小写）")
-        logger.error("  3. 配置的相对路径是否正确")
-        logger.error("下载地址: https://raw.githubusercontent.com/berstend/puppeteer-extra/master/packages/puppeteer-extra-plugin-stealth/evasions/stealth.min.js")
-        sys.exit(1)
-    
-    with open(script_path, "r", encoding="utf-8") as f:
-        js = f.read()
+    js = _stealth_js_cache.get(script_path)
+    if js is None:
+        logger.info(f"🔧 检查反检测脚本: {script_path}")
+        
+        if not os.path.exists(script_path):
+            logger.error(f"❌ 未找到 stealth.min.js！")
+            logger.error(f"预期路径: {script_path}")
+            logger.error(f"主脚本目录: {script_dir}")
+            logger.error(f"配置的相对路径: {relative_path}")
+            logger.error("请检查以下几点：")
+            logger.error("  1. 文件是否已上传")
+            logger.error("  2. 文件名是否正确（区分大小写）")
+            logger.error("  3. 配置的相对路径是否正确")
+            logger.error("下载地址: https://raw.githubusercontent.com/berstend/puppeteer-extra/master/packages/puppeteer-extra-plugin-stealth/evasions/stealth.min.js")
+            sys.exit(1)
+        
+        with open(script_path, "r", encoding="utf-8") as f:
+            js = f.read()
+        _stealth_js_cache[script_path] = js
     
     driver.execute_cdp_cmd("Page.addScriptToEvaluateOnNewDocument", {"source": js})
     logger.info("✅ 已注入 stealth.min.js 反检测脚本")
@@ -180,27 +237,40 @@ def do_login(ctx: RuntimeContext, username: str, password: str) -> bool:
         logger.info("🖱️  点击登录按钮")
         login_btn.click()
         logger.info("⏳ 正在登录中，耗时较长请稍等……")
-        time.sleep(3)
         
-        # 处理登录验证码
+        # 等待登录验证码出现或直接跳转到控制台
+        logger.info("🔍 检查是否触发登录验证码...")
         try:
-            logger.info("🔍 检查是否触发登录验证码...")
-            ctx.wait.until(EC.visibility_of_element_located((By.ID, "tcaptcha_iframe_dy")))
+            ctx.wait.until(EC.any_of(
+                EC.visibility_of_element_located((By.ID, "tcaptcha_iframe_dy")),
+                EC.url_contains("dashboard")
+            ))
+        except TimeoutException:
+            pass
+        
+        # 处理登录验证码
+        captcha_frames = ctx.driver.find_elements(By.ID, "tcaptcha_iframe_dy")
+        if "dashboard" not in ctx.driver.current_url and captcha_frames and captcha_frames[0].is_displayed():
             logger.warning("⚠️  触发登录验证码！")
             ctx.driver.switch_to.frame("tcaptcha_iframe_dy")
             
             from captcha import process_captcha
-            if not process_captcha(ctx, ctx.config):
+            if not process_captcha(ctx, ctx.config, "login"):
                 logger.error("❌ 登录验证码处理失败")
                 return False
                 
             logger.info("✅ 登录验证码处理成功")
-        except TimeoutException:
+        else:
             logger.info("✅ 未触发登录验证码")
         
         ctx.driver.switch_to.default_content()
         logger.info("⏳ 等待页面跳转...")
-        time.sleep(5)
+        try:
+            WebDriverWait(ctx.driver, ctx.config.get("login_redirect_timeout", 15)).until(
+                EC.url_contains("dashboard")
+            )
+        except TimeoutException:
+            pass
         
         # 验证登录状态
         current_url = ctx.driver.current_url
@@ -234,13 +304,22 @@ def do_login(ctx: RuntimeContext, username: str, password: str) -> bool:
         return False
 
 
+def find_sign_in_status(driver):
+    """查找每日签到状态元素，未加载时返回 False（供 WebDriverWait 使用）"""
+    try:
+        earn_btn_qddiv = driver.find_element(By.XPATH, '//*[@id="app"]/div[1]/div[3]/div[2]/div/div/div[2]/div[2]/div/div/div/div[1]/div')
+        earn_btn_qd = earn_btn_qddiv.find_element(By.XPATH, './/span[contains(text(),"每日签到")]')
+        return earn_btn_qd.find_element(By.XPATH, './following-sibling::span[1]')
+    except (NoSuchElementException, StaleElementReferenceException):
+        return False
+
+
 def do_sign_in(ctx: RuntimeContext) -> bool:
     """执行签到"""
     try:
         logger.info("=" * 60)
         logger.info("🌐 访问赚取积分页: https://app.rainyun.com/account/reward/earn")
         ctx.driver.get("https://app.rainyun.com/account/reward/earn")
-        ctx.driver.implicitly_wait(5)
         
         logger.info(f"   当前页面URL: {ctx.driver.current_url}")
         logger.info(f"   当前页面标题: {ctx.driver.title}")
@@ -248,9 +327,7 @@ def do_sign_in(ctx: RuntimeContext) -> bool:
         # 查找签到按钮
         logger.info("🔍 查找每日签到按钮...")
         try:
-            earn_btn_qddiv = ctx.driver.find_element(By.XPATH, '//*[@id="app"]/div[1]/div[3]/div[2]/div/div/div[2]/div[2]/div/div/div/div[1]/div')
-            earn_btn_qd = earn_btn_qddiv.find_element(By.XPATH, './/span[contains(text(),"每日签到")]')
-            status_elem = earn_btn_qd.find_element(By.XPATH, './following-sibling::span[1]')
+            status_elem = ctx.wait.until(find_sign_in_status)
             status_text = status_elem.text.strip()
             
             logger.info(f"📌 签到状态: {status_text}")
@@ -261,18 +338,29 @@ def do_sign_in(ctx: RuntimeContext) -> bool:
                 earn_btn.click()
                 
                 # 处理签到验证码
-                time.sleep(2)
+                WebDriverWait(ctx.driver, ctx.config.get("captcha_appear_timeout", 10)).until(
+                    EC.frame_to_be_available_and_switch_to_it((By.ID, "tcaptcha_iframe_dy"))
+                )
                 logger.info("⚠️  触发签到验证码")
-                ctx.driver.switch_to.frame("tcaptcha_iframe_dy")
                 
                 from captcha import process_captcha
-                if not process_captcha(ctx, ctx.config):
+                if not process_captcha(ctx, ctx.config, "sign_in"):
                     logger.error("❌ 签到验证码处理失败")
                     return False
                 
                 ctx.driver.switch_to.default_content()
                 logger.info("⏳ 等待签到结果...")
-                time.sleep(5)
+                def reward_claimed(driver):
+                    elem = find_sign_in_status(driver)
+                    return bool(elem) and elem.text.strip() != "领取奖励"
+                
+                try:
+                    WebDriverWait(
+                        ctx.driver, ctx.config.get("sign_in_result_timeout", 10),
+                        ignored_exceptions=[StaleElementReferenceException]
+                    ).until(reward_claimed)
+                except TimeoutException:
+                    logger.warning("⚠️  签到状态未及时刷新")
                 
                 logger.info("✅ 签到奖励领取成功")
             else:
@@ -298,68 +386,92 @@ def do_sign_in(ctx: RuntimeContext) -> bool:
         return False
 
 
-def execute_auto_renew(account: Account, config: dict) -> str:
+def preflight_sign_in(account: Account, config: dict) -> Tuple[Optional[bool], Optional[RainyunAPI]]:
     """
-    执行自动续费
+    通过 HTTP 预检查今日签到状态（优先使用 API Key，其次使用已保存的会话）
     
     Returns:
-        续费结果摘要
+        (是否已签到，无法判断时为 None；使用 API Key 创建的客户端，供后续复用)
     """
-    logger.info("=" * 60)
-    logger.info("🔄 开始执行自动续费检查")
+    if not config.get("sign_in_preflight", True):
+        return None, None
+    
+    logger.info("🔍 预检查今日签到状态...")
+    if account.api_key:
+        try:
+            api = RainyunAPI(account.api_key, config)
+        except Exception as e:
+            logger.warning(f"⚠️  API 客户端初始化失败: {e}")
+            return None, None
+        try:
+            return api.is_signed_in_today(), api
+        except Exception as e:
+            logger.warning(f"⚠️  签到状态查询失败: {e}")
+            return None, api
+    
+    cookies = SessionStore(config).load_cookies(account.username, account.password)
+    if not cookies:
+        logger.info("   无 API Key 与已保存会话，跳过预检查")
+        return None, None
     try:
-        api = RainyunAPI(account.api_key, config)
-        manager = ServerManager(api, config)
-        
-        result = manager.check_and_renew()
-        report = manager.generate_report(result)
-        
-        logger.info("\n" + report)
-        
-        # 生成简短摘要
-        summary = f"续费: {result['renewed']}台成功, {result['skipped']}台跳过, {result['failed']}台失败"
-        return summary
-        
+        return RainyunAPI("", config, cookies=cookies).is_signed_in_today(), None
     except Exception as e:
-        logger.error(f"❌ 自动续费失败: {e}", exc_info=True)
-        return f"续费失败: {str(e)}"
+        logger.warning(f"⚠️  签到状态查询失败（会话可能已过期）: {e}")
+        return None, None
 
 
-def sign_in_rainyun(account: Account, config: dict) -> AccountResult:
+def sign_in_rainyun(account: Account, config: dict, start_at: Optional[float] = None) -> AccountResult:
     """
     单账号签到流程
     
+    Args:
+        start_at: 时间表分配的启动时间（预检查已签到的账号无需等待）
+    
     Returns:
         账号执行结果
     """
     result = AccountResult(username=account.username)
-    driver = None
-    temp_dir = None
+    lease = None
+    api = None
     
     try:
         logger.info("\n" + "=" * 80)
         logger.info(f"开始处理账号: {account.username}")
         logger.info("=" * 80)
         
-        # 随机延时
-        delay_min = random.randint(0, config["max_delay"])
-        delay_sec = random.randint(0, 60)
-        logger.info(f"⏳ 随机延时 {delay_min} 分钟 {delay_sec} 秒")
-        time.sleep(delay_min * 60 + delay_sec)
+        # 今日已签到则无需启动浏览器
+        signed, api = preflight_sign_in(account, config)
+        if signed:
+            logger.info("✅ 今日已签到，跳过浏览器")
+            result.already_signed = True
+            if api:
+                try:
+                    result.points_before = result.points_after = api.get_user_points()
+                    logger.info(f"💰 当前积分: {result.points_after} （约 {result.points_after / config['points_to_cny_rate']:.2f} 元）")
+                except Exception as e:
+                    logger.warning(f"⚠️  积分获取失败: {e}")
+            run_auto_renew(result, account, config, api)
+            logger.info(f"✅ 账号 {account.username} 处理完成")
+            return result
+        
+        # 按时间表等待（随机启动时间，替代逐账号累加的随机延时）
+        wait_until(start_at)
         
-        # 初始化组件
-        logger.info("🔧 初始化 ddddocr 验证码识别库")
-        ocr = ddddocr.DdddOcr(ocr=True, show_ad=False)
-        det = ddddocr.DdddOcr(det=True, show_ad=False)
-        logger.info("✅ ddddocr 初始化成功")
+        # 初始化组件（模型进程内只加载一次）
+        ocr = MODELS.ocr
+        det = MODELS.det
+        logger.info("✅ ddddocr 模型就绪")
         
-        driver = init_selenium(config)
-        inject_stealth_js(driver, config)
+        lease = BROWSERS.acquire(config, init_selenium, lambda d: prepare_page(d, config))
+        driver = lease.driver
         wait = WebDriverWait(driver, config["timeout"])
         
-        # 创建临时目录
-        temp_dir = tempfile.mkdtemp(prefix="rainyun-")
-        logger.info(f"📁 临时目录: {temp_dir}")
+        # 验证码图片默认仅在内存中处理，配置调试目录时才保存
+        debug_dir = None
+        if config.get("captcha_debug_dir"):
+            os.makedirs(config["captcha_debug_dir"], exist_ok=True)
+            debug_dir = tempfile.mkdtemp(prefix="rainyun-", dir=config["captcha_debug_dir"])
+            logger.info(f"📁 验证码调试目录: {debug_dir}")
         
         # 构建上下文
         ctx = RuntimeContext(
@@ -367,23 +479,30 @@ def sign_in_rainyun(account: Account, config: dict) -> AccountResult:
             wait=wait,
             ocr=ocr,
             det=det,
-            temp_dir=temp_dir,
-            config=config
+            config=config,
+            debug_dir=debug_dir,
+            username=account.username
         )
         
         # 记录签到前积分
         if account.api_key:
             try:
                 logger.info("🔍 正在获取签到前积分...")
-                api = RainyunAPI(account.api_key, config)
+                api = api or RainyunAPI(account.api_key, config)
                 result.points_before = api.get_user_points()
                 logger.info(f"💰 签到前积分: {result.points_before} （约 {result.points_before / config['points_to_cny_rate']:.2f} 元）")
             except Exception as e:
                 logger.warning(f"⚠️  获取初始积分失败: {e}")
         
-        # 执行登录
-        result.login_success = do_login(ctx, account.username, account.password)
+        # 执行登录（优先复用已保存的会话）
+        session_store = SessionStore(config)
+        result.login_success = session_store.restore(driver, account.username, account.password)
         if not result.login_success:
+            result.login_success = do_login(ctx, account.username, account.password)
+        if result.login_success:
+            # 恢复成功后同样重新保存，刷新服务端轮换的 Cookie
+            session_store.save(driver, account.username, account.password)
+        else:
             result.error_msg = "登录失败"
             logger.error("❌ 登录失败，跳过该账号")
             return result
@@ -399,7 +518,7 @@ def sign_in_rainyun(account: Account, config: dict) -> AccountResult:
         if account.api_key:
             try:
                 logger.info("🔍 正在获取签到后积分...")
-                api = RainyunAPI(account.api_key, config)
+                api = api or RainyunAPI(account.api_key, config)
                 result.points_after = api.get_user_points()
                 result.points_earned = result.points_after - result.points_before
                 logger.info(f"💰 当前积分: {result.points_after} (本次获得 {result.points_earned} 分)")
@@ -408,12 +527,7 @@ def sign_in_rainyun(account: Account, config: dict) -> AccountResult:
                 logger.warning(f"⚠️  获取最终积分失败: {e}")
         
         # 执行自动续费（如果启用）
-        result.auto_renew_enabled = account.auto_renew
-        if account.auto_renew and account.api_key:
-            result.renew_summary = execute_auto_renew(account, config)
-        elif account.auto_renew and not account.api_key:
-            result.renew_summary = "未配置API Key，跳过续费"
-            logger.warning("⚠️  该账号已启用自动续费但未配置 API Key，跳过续费")
+        run_auto_renew(result, account, config, api)
         
         logger.info(f"✅ 账号 {account.username} 处理完成")
         return result
@@ -424,24 +538,57 @@ def sign_in_rainyun(account: Account, config: dict) -> AccountResult:
         return result
         
     finally:
-        # 清理资源
-        if driver:
-            try:
-                driver.quit()
-                logger.info(f"🔒 浏览器已关闭")
-            except Exception as e:
-                logger.warning(f"⚠️  关闭浏览器失败: {e}")
-        
-        if temp_dir:
-            try:
-                shutil.rmtree(temp_dir, ignore_errors=True)
-                logger.info(f"🗑️  临时文件已清理")
-            except Exception as e:
-                logger.warning(f"⚠️  清理临时文件失败: {e}")
+        # 归还浏览器（复用模式下仅销毁账号上下文）
+        if lease:
+            BROWSERS.release(lease)
         
         logger.info("=" * 80 + "\n")
 
 
+def run_auto_renew(result: AccountResult, account: Account, config: dict, api: Optional[RainyunAPI] = None):
+    """执行自动续费（如果启用），结果写入 result"""
+    result.auto_renew_enabled = account.auto_renew
+    if account.auto_renew and account.api_key:
+        result.renew_summary = execute_auto_renew(account, config, api)
+    elif account.auto_renew and not account.api_key:
+        result.renew_summary = "未配置API Key，跳过续费"
+        logger.warning("⚠️  该账号已启用自动续费但未配置 API Key，跳过续费")
+
+
+def process_account(idx: int, total: int, account: Account, config: dict,
+                    journal: Optional[RunJournal] = None, start_at: Optional[float] = None) -> AccountResult:
+    """
+    处理单个账号（串行与并发模式共用）
+    
+    Returns:
+        账号执行结果，异常时返回失败结果
+    """
+    logger.info(f"\n{'#'*80}")
+    logger.info(f"第 {idx}/{total} 个账号")
+    logger.info(f"{'#'*80}")
+    
+    try:
+        result = sign_in_rainyun(account, config, start_at)
+    except Exception as e:
+        logger.error(f"账号 {account.username} 处理失败: {e}")
+        # 即使失败也要记录结果
+        result = AccountResult(
+            username=account.username,
+            error_msg=f"未知异常: {str(e)}"
+        )
+    
+    # 立即写入运行日志，任务中断后可从此处续跑
+    if journal:
+        journal.record(result)
+    return result
+
+
+def restore_result(data: dict) -> AccountResult:
+    """由运行日志记录还原执行结果（忽略未知字段）"""
+    names = {f.name for f in fields(AccountResult)}
+    return AccountResult(**{k: v for k, v in data.items() if k in names})
+
+
 def generate_summary_report(results: List[AccountResult], config: dict) -> str:
     """
     生成汇总报告
@@ -488,7 +635,7 @@ def generate_summary_report(results: List[AccountResult], config: dict) -> str:
         lines.append(f"\n【账号 {idx}】 {result.username}")
         
         if result.is_success():
-            lines.append(f"  状态: ✅ 成功")
+            lines.append(f"  状态: ✅ 今日已签到" if result.already_signed else f"  状态: ✅ 成功")
             if result.points_after > 0:
                 lines.append(f"  积分: {result.points_before} → {result.points_after} (+{result.points_earned})")
             if result.auto_renew_enabled:
@@ -508,38 +655,6 @@ def generate_summary_report(results: List[AccountResult], config: dict) -> str:
     return "\n".join(lines)
 
 
-def send_notification(title: str, content: str):
-    """
-    发送通知（可扩展对接青龙面板通知）
-    
-    Args:
-        title: 通知标题
-        content: 通知内容
-    """
-    try:
-        # 方法1: 尝试导入青龙面板的notify模块
-        try:
-            print(QLAPI.notify(title, content))
-            logger.info("✅ 通知已发送（青龙面板notify）")
-            return
-        except ImportError:
-            pass
-        
-        # 方法2: 通过环境变量判断是否配置了通知渠道
-        # 这里可以扩展支持更多通知方式（Telegram、企业微信等）
-        
-        # 如果没有配置通知，仅在日志中输出
-        logger.info("=" * 60)
-        logger.info("📬 执行结果通知:")
-        logger.info("-" * 60)
-        logger.info(content)
-        logger.info("=" * 60)
-        logger.info("💡 提示: 如需推送通知，请在青龙面板配置通知渠道")
-        
-    except Exception as e:
-        logger.warning(f"⚠️  发送通知失败: {e}")
-
-
 def main():
     """主函数"""
     # 记录开始时间
@@ -549,36 +664,55 @@ def main():
     
     # 加载配置
     config = CONFIG.config
+    MODELS.configure(config)
     
     # 解析账号
     accounts = parse_accounts()
     
-    # 存储所有账号的执行结果
-    all_results: List[AccountResult] = []
-    
-    # 依次处理每个账号
+    # 今日已成功的账号直接沿用日志中的结果，只处理未完成或失败的账号
+    journal = RunJournal(config)
+    journal.prune()
+    completed = journal.completed()
+    results: Dict[int, AccountResult] = {}
+    pending = []
     for idx, account in enumerate(accounts, 1):
-        logger.info(f"\n{'#'*80}")
-        logger.info(f"第 {idx}/{len(accounts)} 个账号")
-        logger.info(f"{'#'*80}")
-        
-        try:
-            result = sign_in_rainyun(account, config)
-            all_results.append(result)
-        except Exception as e:
-            logger.error(f"账号 {account.username} 处理失败: {e}")
-            # 即使失败也要记录结果
-            failed_result = AccountResult(
-                username=account.username,
-                error_msg=f"未知异常: {str(e)}"
-            )
-            all_results.append(failed_result)
-        
-        # 账号间间隔
-        if idx < len(accounts):
-            interval = random.uniform(3, 6)
-            logger.info(f"⏳ 等待 {interval:.1f} 秒后处理下一个账号...")
-            time.sleep(interval)
+        if account.username in completed:
+            logger.info(f"⏭️  账号 {account.username} 今日已成功处理，跳过")
+            results[idx] = restore_result(completed[account.username])
+        else:
+            pending.append((idx, account))
+    if completed:
+        logger.info(f"📒 运行日志: {len(accounts) - len(pending)} 个账号今日已完成，{len(pending)} 个待处理")
+    
+    # 所有待处理账号共享一个随机启动时间窗口
+    schedule = JitterSchedule.from_config(len(pending), config)
+    logger.info(f"🗓️  启动时间表: {schedule.describe()}")
+    
+    max_workers = min(max(1, int(config.get("max_parallel_browsers", 1))), max(1, len(pending)))
+    
+    try:
+        if max_workers > 1:
+            # 并发处理：每个工作线程独立持有浏览器（复用模式下线程内各账号共享）、RuntimeContext 与临时目录
+            logger.info(f"🚀 并发模式：最多同时运行 {max_workers} 个浏览器")
+            with ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix="rainyun") as executor:
+                futures = {
+                    idx: executor.submit(
+                        process_account, idx, len(accounts), account, config, journal, schedule.start_time(n)
+                    )
+                    for n, (idx, account) in enumerate(pending)
+                }
+                for idx, future in futures.items():
+                    results[idx] = future.result()
+        else:
+            # 依次处理每个账号，到达计划时间后启动（前一个账号超时则立即开始）
+            for n, (idx, account) in enumerate(pending):
+                results[idx] = process_account(idx, len(accounts), account, config, journal, schedule.start_time(n))
+    finally:
+        # 关闭复用的浏览器（异常或中断退出时同样执行，避免遗留 Chrome 进程）
+        BROWSERS.close_all()
+    
+    # 按账号顺序汇总结果
+    all_results: List[AccountResult] = [results[idx] for idx in sorted(results)]
     
     # 计算总耗时
     elapsed_time = time.time() - start_time
@@ -589,12 +723,18 @@ def main():
     logger.info("\n" + "=" * 80)
     logger.info("🎉 所有账号处理完成！")
     logger.info(f"⏱️  总耗时: {minutes} 分钟 {seconds} 秒")
+    model_load_time = MODELS.total_load_time()
+    if model_load_time > 0:
+        logger.info(f"🧠 模型加载耗时: {model_load_time:.2f} 秒（{len(accounts)} 个账号共享）")
     logger.info("=" * 80)
     
     # 生成并发送通知
     summary_report = generate_summary_report(all_results, config)
     logger.info("\n" + summary_report)
     
+    # 写出运行指标
+    METRICS.export(all_results, config, {"model_load_seconds": model_load_time})
+    
     # 发送通知
     send_notification("雨云签到任务完成", summary_report)
 
@@ -0,0 +1,238 @@
+import json
+import logging
+import os
+import threading
+import time
+from contextlib import contextmanager
+from dataclasses import asdict, is_dataclass
+from typing import Dict, List, Optional
+
+logger = logging.getLogger(__name__)
+
+
+class CaptchaSession:
+    """单次验证码处理的指标（一次 process_captcha 调用，可能包含多次尝试）"""
+    
+    def __init__(self, username: str, purpose: str):
+        self.username = username
+        self.purpose = purpose
+        self.attempts: List[dict] = []
+        self.outcome = "unknown"
+        self.started_at = time.time()
+        self.duration = 0.0
+        self._start = time.perf_counter()
+    
+    def start_attempt(self):
+        """开始新一次尝试"""
+        self.attempts.append({
+            "attempt": len(self.attempts) + 1,
+            "stages": {},
+            "failure": None
+        })
+    
+    @property
+    def current(self) -> dict:
+        if not self.attempts:
+            self.start_attempt()
+        return self.attempts[-1]
+    
+    def record(self, stage: str, elapsed: float):
+        """记录阶段耗时（同一尝试内同名阶段累加）"""
+        stages = self.current["stages"]
+        stages[stage] = stages.get(stage, 0.0) + elapsed
+    
+    @contextmanager
+    def stage(self, name: str):
+        """计时上下文"""
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.record(name, time.perf_counter() - start)
+    
+    def fail(self, reason: str):
+        """记录本次尝试失败原因"""
+        self.current["failure"] = reason
+    
+    def finish(self, success: bool):
+        """结束验证码处理"""
+        self.outcome = "success" if success else "failed"
+        self.duration = time.perf_counter() - self._start
+    
+    def to_dict(self) -> dict:
+        return {
+            "username": self.username,
+            "purpose": self.purpose,
+            "outcome": self.outcome,
+            "started_at": self.started_at,
+            "duration": round(self.duration, 4),
+            "attempts": [
+                {**a, "stages": {k: round(v, 4) for k, v in a["stages"].items()}}
+                for a in self.attempts
+            ]
+        }
+
+
+class RunMetrics:
+    """整次运行的指标汇总（多线程安全）"""
+    
+    def __init__(self):
+        self.started_at = time.time()
+        self.sessions: List[CaptchaSession] = []
+        self._lock = threading.Lock()
+    
+    def captcha_session(self, username: str = "", purpose: str = "") -> CaptchaSession:
+        """创建验证码处理指标"""
+        session = CaptchaSession(username, purpose)
+        with self._lock:
+            self.sessions.append(session)
+        return session
+    
+    def build_record(self, results: list, extra: Optional[dict] = None) -> dict:
+        """生成 JSON 运行记录"""
+        with self._lock:
+            sessions = [s.to_dict() for s in self.sessions]
+        
+        record = {
+            "started_at": self.started_at,
+            "finished_at": time.time(),
+            "duration": round(time.time() - self.started_at, 3),
+            "accounts": [asdict(r) if is_dataclass(r) else dict(r) for r in results],
+            "captcha_sessions": sessions,
+        }
+        if extra:
+            record.update(extra)
+        return record
+    
+    def export(self, results: list, config: dict, extra: Optional[dict] = None):
+        """写出 JSON 运行记录与 Prometheus textfile"""
+        metrics_dir = config.get("metrics_dir", "")
+        if not metrics_dir:
+            return
+        
+        # 相对路径以主脚本目录为基准
+        script_dir = os.path.dirname(os.path.abspath(__file__))
+        metrics_dir = os.path.abspath(os.path.join(script_dir, metrics_dir))
+        
+        try:
+            os.makedirs(metrics_dir, exist_ok=True)
+            record = self.build_record(results, extra)
+            
+            json_path = os.path.join(metrics_dir, "rainyun_run.json")
+            _atomic_write(json_path, json.dumps(record, ensure_ascii=False, indent=2))
+            
+            prom_path = os.path.join(metrics_dir, "rainyun.prom")
+            _atomic_write(prom_path, format_prometheus(record))
+            
+            logger.info(f"📈 运行指标已写入: {json_path}, {prom_path}")
+        except Exception as e:
+            logger.warning(f"⚠️  写入运行指标失败: {e}")
+
+
+def _atomic_write(path: str, content: str):
+    """原子写入（node-exporter 可能随时读取 textfile）"""
+    tmp_path = f"{path}.{os.getpid()}.tmp"
+    with open(tmp_path, "w", encoding="utf-8") as f:
+        f.write(content)
+    os.replace(tmp_path, path)
+
+
+def _label(value) -> str:
+    """转义 Prometheus 标签值"""
+    return str(value).replace("\\", "\\\\").replace("\"", "\\\"").replace("\n", "\\n")
+
+
+# 失败原因前缀 -> 固定原因代码（按顺序匹配）
+FAILURE_REASONS = (
+    ("超时", "timeout"),
+    ("验证码图片下载失败", "download_failed"),
+    ("验证码碎片无效", "invalid_sprite"),
+    ("图案检测失败", "detect_error"),
+    ("未检测到验证码图案", "no_regions"),
+    ("检测区域不足", "insufficient_regions"),
+    ("验证码答案无效", "low_similarity"),
+    ("验证码验证失败", "rejected"),
+)
+
+
+def normalize_reason(reason: str) -> str:
+    """将失败原因映射为固定的原因代码，避免异常文本进入标签导致基数膨胀"""
+    for prefix, code in FAILURE_REASONS:
+        if reason.startswith(prefix):
+            return code
+    return "other"
+
+
+def format_prometheus(record: dict) -> str:
+    """将运行记录转换为 Prometheus textfile 格式"""
+    accounts = record["accounts"]
+    sessions = record["captcha_sessions"]
+    
+    outcomes: Dict[str, int] = {}
+    failures: Dict[str, int] = {}
+    stage_sum: Dict[str, float] = {}
+    stage_count: Dict[str, int] = {}
+    attempts = 0
+    for session in sessions:
+        outcomes[session["outcome"]] = outcomes.get(session["outcome"], 0) + 1
+        for attempt in session["attempts"]:
+            attempts += 1
+            if attempt["failure"]:
+                reason = normalize_reason(attempt["failure"])
+                failures[reason] = failures.get(reason, 0) + 1
+            for stage, elapsed in attempt["stages"].items():
+                stage_sum[stage] = stage_sum.get(stage, 0.0) + elapsed
+                stage_count[stage] = stage_count.get(stage, 0) + 1
+    
+    success = sum(
+        1 for a in accounts
+        if a.get("already_signed") or (a.get("login_success") and a.get("sign_in_success"))
+    )
+    
+    lines = [
+        "# HELP rainyun_run_timestamp_seconds Unix time the run finished.",
+        "# TYPE rainyun_run_timestamp_seconds gauge",
+        f"rainyun_run_timestamp_seconds {record['finished_at']:.0f}",
+        "# HELP rainyun_run_duration_seconds Wall clock duration of the run.",
+        "# TYPE rainyun_run_duration_seconds gauge",
+        f"rainyun_run_duration_seconds {record['duration']}",
+        "# HELP rainyun_accounts Accounts processed in the run.",
+        "# TYPE rainyun_accounts gauge",
+        f'rainyun_accounts{{result="success"}} {success}',
+        f'rainyun_accounts{{result="failed"}} {len(accounts) - success}',
+        "# HELP rainyun_captcha_sessions Captcha sessions by final outcome.",
+        "# TYPE rainyun_captcha_sessions gauge",
+    ]
+    for outcome, count in sorted(outcomes.items()):
+        lines.append(f'rainyun_captcha_sessions{{outcome="{_label(outcome)}"}} {count}')
+    
+    lines += [
+        "# HELP rainyun_captcha_attempts Captcha attempts in the run.",
+        "# TYPE rainyun_captcha_attempts gauge",
+        f"rainyun_captcha_attempts {attempts}",
+        "# HELP rainyun_captcha_attempt_failures Failed captcha attempts by reason.",
+        "# TYPE rainyun_captcha_attempt_failures gauge",
+    ]
+    for reason, count in sorted(failures.items()):
+        lines.append(f'rainyun_captcha_attempt_failures{{reason="{_label(reason)}"}} {count}')
+    
+    lines += [
+        "# HELP rainyun_captcha_stage_seconds Time spent per captcha stage.",
+        "# TYPE rainyun_captcha_stage_seconds summary",
+    ]
+    for stage in sorted(stage_sum):
+        lines.append(f'rainyun_captcha_stage_seconds_sum{{stage="{_label(stage)}"}} {stage_sum[stage]:.4f}')
+        lines.append(f'rainyun_captcha_stage_seconds_count{{stage="{_label(stage)}"}} {stage_count[stage]}')
+    
+    if "model_load_seconds" in record:
+        lines += [
+            "# HELP rainyun_model_load_seconds Time spent loading ddddocr models.",
+            "# TYPE rainyun_model_load_seconds gauge",
+            f"rainyun_model_load_seconds {record['model_load_seconds']:.4f}",
+        ]
+    
+    return "\n".join(lines) + "\n"
+
+
+# 全局运行指标
+METRICS = RunMetrics()
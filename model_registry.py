@@ -0,0 +1,192 @@
+import logging
+import struct
+import threading
+import time
+import zlib
+from contextlib import contextmanager
+from typing import Dict
+
+logger = logging.getLogger(__name__)
+
+
+class SharedModel:
+    """共享的 ddddocr 模型（推理串行化，保证多线程安全）"""
+    
+    def __init__(self, name: str, model):
+        self.name = name
+        self.model = model
+        self._lock = threading.Lock()
+    
+    def classification(self, img, **kwargs):
+        """OCR 识别"""
+        with self._lock:
+            return self.model.classification(img, **kwargs)
+    
+    def classification_many(self, images: list, **kwargs) -> list:
+        """
+        依次识别多张图片（只加锁一次）
+        
+        ddddocr 没有批量推理接口，这里并非批量推理，只是在同一次加锁内逐张识别，
+        避免与其他线程交替排队。
+        """
+        with self._lock:
+            return [self.model.classification(img, **kwargs) for img in images]
+    
+    def detection(self, img):
+        """目标检测"""
+        with self._lock:
+            return self.model.detection(img)
+
+
+def _dummy_png(width: int = 96, height: int = 48) -> bytes:
+    """生成预热用的灰度 PNG（浅色底 + 深色方块，无需图像库）"""
+    rows = []
+    for y in range(height):
+        row = bytearray(b"\xe0" * width)
+        if height // 4 <= y < height * 3 // 4:
+            row[width // 4:width * 3 // 4] = b"\x20" * (width * 3 // 4 - width // 4)
+        rows.append(b"\x00" + bytes(row))
+    
+    def chunk(tag: bytes, data: bytes) -> bytes:
+        return struct.pack(">I", len(data)) + tag + data + struct.pack(">I", zlib.crc32(tag + data))
+    
+    header = struct.pack(">IIBBBBB", width, height, 8, 0, 0, 0, 0)
+    return (b"\x89PNG\r\n\x1a\n" + chunk(b"IHDR", header)
+            + chunk(b"IDAT", zlib.compress(b"".join(rows))) + chunk(b"IEND", b""))
+
+
+@contextmanager
+def _onnx_session_options(intra_threads: int, inter_threads: int, execution_mode: str):
+    """
+    加载期间为 onnxruntime.InferenceSession 注入 SessionOptions
+    
+    ddddocr 不支持传入会话参数，这里临时包装构造函数（调用方需持有加载锁）。
+    """
+    import onnxruntime
+    
+    original = onnxruntime.InferenceSession
+    
+    def build_options():
+        options = onnxruntime.SessionOptions()
+        if intra_threads > 0:
+            options.intra_op_num_threads = intra_threads
+        if inter_threads > 0:
+            options.inter_op_num_threads = inter_threads
+        if execution_mode == "parallel":
+            options.execution_mode = onnxruntime.ExecutionMode.ORT_PARALLEL
+        else:
+            options.execution_mode = onnxruntime.ExecutionMode.ORT_SEQUENTIAL
+        return options
+    
+    def session_factory(*args, **kwargs):
+        if kwargs.get("sess_options") is None and len(args) < 2:
+            kwargs["sess_options"] = build_options()
+        return original(*args, **kwargs)
+    
+    onnxruntime.InferenceSession = session_factory
+    try:
+        yield
+    finally:
+        onnxruntime.InferenceSession = original
+
+
+class ModelRegistry:
+    """进程级模型注册表：首次使用时加载，之后所有账号共享同一实例"""
+    
+    # 模型名称 -> ddddocr 构造参数
+    MODEL_ARGS = {
+        "ocr": {"ocr": True},
+        "det": {"det": True},
+    }
+    
+    def __init__(self):
+        self._models: Dict[str, SharedModel] = {}
+        self._load_times: Dict[str, float] = {}
+        self._warmup_times: Dict[str, float] = {}
+        self._lock = threading.Lock()
+        self.intra_threads = 0
+        self.inter_threads = 0
+        self.execution_mode = "sequential"
+        self.warmup = True
+    
+    def configure(self, config: dict):
+        """读取推理配置（需在首次加载模型前调用）"""
+        self.intra_threads = int(config.get("onnx_intra_op_threads", 0))
+        self.inter_threads = int(config.get("onnx_inter_op_threads", 0))
+        self.execution_mode = config.get("onnx_execution_mode", "sequential")
+        self.warmup = bool(config.get("model_warmup", True))
+    
+    def get(self, name: str) -> SharedModel:
+        """获取模型（懒加载）"""
+        model = self._models.get(name)
+        if model is not None:
+            return model
+        
+        with self._lock:
+            # 双重检查，避免并发线程重复加载
+            model = self._models.get(name)
+            if model is None:
+                model = self._load(name)
+                self._models[name] = model
+            return model
+    
+    def _load(self, name: str) -> SharedModel:
+        """加载模型并记录耗时"""
+        if name not in self.MODEL_ARGS:
+            raise ValueError(f"未知模型: {name}")
+        
+        import ddddocr
+        
+        logger.info(f"🔧 加载 ddddocr 模型: {name}")
+        start = time.perf_counter()
+        with _onnx_session_options(self.intra_threads, self.inter_threads, self.execution_mode):
+            model = ddddocr.DdddOcr(show_ad=False, **self.MODEL_ARGS[name])
+        elapsed = time.perf_counter() - start
+        self._load_times[name] = elapsed
+        logger.info(f"✅ 模型 {name} 加载完成，耗时 {elapsed:.2f} 秒")
+        
+        if self.warmup:
+            self._warm_up(name, model)
+        return SharedModel(name, model)
+    
+    def _warm_up(self, name: str, model):
+        """用内置图片执行一次推理，使首个真实验证码不承担延迟初始化开销"""
+        start = time.perf_counter()
+        try:
+            image = _dummy_png()
+            if name == "det":
+                model.detection(image)
+            else:
+                model.classification(image)
+        except Exception as e:
+            logger.warning(f"⚠️  模型 {name} 预热失败: {e}")
+            return
+        elapsed = time.perf_counter() - start
+        self._warmup_times[name] = elapsed
+        logger.info(f"🔥 模型 {name} 预热完成，耗时 {elapsed:.2f} 秒")
+    
+    @property
+    def ocr(self) -> SharedModel:
+        """OCR 模型"""
+        return self.get("ocr")
+    
+    @property
+    def det(self) -> SharedModel:
+        """检测模型"""
+        return self.get("det")
+    
+    def load_times(self) -> Dict[str, float]:
+        """各模型加载耗时（秒）"""
+        return dict(self._load_times)
+    
+    def warmup_times(self) -> Dict[str, float]:
+        """各模型预热耗时（秒）"""
+        return dict(self._warmup_times)
+    
+    def total_load_time(self) -> float:
+        """模型加载总耗时（秒，含预热）"""
+        return sum(self._load_times.values()) + sum(self._warmup_times.values())
+
+
+# 全局模型注册表
+MODELS = ModelRegistry()
@@ -0,0 +1,35 @@
+import logging
+
+logger = logging.getLogger(__name__)
+
+
+def send_notification(title: str, content: str):
+    """
+    发送通知（可扩展对接青龙面板通知）
+    
+    Args:
+        title: 通知标题
+        content: 通知内容
+    """
+    try:
+        # 方法1: 尝试导入青龙面板的notify模块
+        try:
+            print(QLAPI.notify(title, content))
+            logger.info("✅ 通知已发送（青龙面板notify）")
+            return
+        except ImportError:
+            pass
+        
+        # 方法2: 通过环境变量判断是否配置了通知渠道
+        # 这里可以扩展支持更多通知方式（Telegram、企业微信等）
+        
+        # 如果没有配置通知，仅在日志中输出
+        logger.info("=" * 60)
+        logger.info("📬 执行结果通知:")
+        logger.info("-" * 60)
+        logger.info(content)
+        logger.info("=" * 60)
+        logger.info("💡 提示: 如需推送通知，请在青龙面板配置通知渠道")
+        
+    except Exception as e:
+        logger.warning(f"⚠️  发送通知失败: {e}")
@@ -0,0 +1,146 @@
+"""
+雨云服务器自动续费（轻量入口）
+
+仅通过 API 查询积分并续费服务器，不启动浏览器，也不导入 OpenCV、ddddocr、
+Selenium，适合高频（如每小时）执行；签到仍由 main.py 每天执行一次。
+"""
+import logging
+import os
+import sys
+import time
+from contextlib import contextmanager
+from typing import Dict, Optional
+
+try:
+    import fcntl
+except ImportError:  # Windows
+    fcntl = None
+
+from config import CONFIG
+from account_parser import parse_accounts, Account
+from api_client import RainyunAPI
+from notify import send_notification
+from server_manager import ServerManager
+
+logger = logging.getLogger(__name__)
+
+# main.py 与 renew.py 共用的续费锁文件（相对主脚本目录）
+RENEW_LOCK_PATH = os.path.join(os.path.dirname(os.path.abspath(__file__)), ".renew.lock")
+
+
+@contextmanager
+def renew_lock():
+    """
+    跨进程续费锁
+    
+    签到任务与每小时续费任务可能同时运行，各自维护积分台账；
+    串行执行续费，避免两个进程同时通过保留积分检查而重复消费。
+    """
+    if fcntl is None:
+        yield
+        return
+    
+    with open(RENEW_LOCK_PATH, "a") as f:
+        fcntl.flock(f, fcntl.LOCK_EX)
+        try:
+            yield
+        finally:
+            fcntl.flock(f, fcntl.LOCK_UN)
+
+
+def check_and_renew_account(account: Account, config: dict, api: Optional[RainyunAPI] = None) -> Dict:
+    """
+    执行单个账号的续费检查
+    
+    Returns:
+        check_and_renew() 的结果，附带 summary 摘要；异常时包含 error
+    """
+    logger.info("=" * 60)
+    logger.info("🔄 开始执行自动续费检查")
+    try:
+        api = api or RainyunAPI(account.api_key, config)
+        manager = ServerManager(api, config)
+        
+        with renew_lock():
+            result = manager.check_and_renew()
+        report = manager.generate_report(result)
+        
+        logger.info("\n" + report)
+        
+        # 生成简短摘要
+        result["summary"] = f"续费: {result['renewed']}台成功, {result['skipped']}台跳过, {result['failed']}台失败"
+        return result
+        
+    except Exception as e:
+        logger.error(f"❌ 自动续费失败: {e}", exc_info=True)
+        return {"error": str(e), "summary": f"续费失败: {str(e)}"}
+
+
+def execute_auto_renew(account: Account, config: dict, api: Optional[RainyunAPI] = None) -> str:
+    """
+    执行自动续费
+    
+    Args:
+        api: 可复用的 API 客户端，为空时新建
+    
+    Returns:
+        续费结果摘要
+    """
+    return check_and_renew_account(account, config, api)["summary"]
+
+
+def main():
+    """续费入口"""
+    start_time = time.time()
+    
+    logging.basicConfig(
+        level=logging.INFO,
+        format='%(asctime)s - %(levelname)s - %(message)s',
+        handlers=[logging.StreamHandler(sys.stdout)]
+    )
+    logger.info("=" * 80)
+    logger.info("雨云服务器自动续费（仅 API，无浏览器）")
+    logger.info("=" * 80)
+    
+    config = CONFIG.config
+    accounts = parse_accounts()
+    
+    lines = []
+    need_notify = False
+    for idx, account in enumerate(accounts, 1):
+        if not account.auto_renew:
+            logger.info(f"⏭️  账号 {account.username} 未启用自动续费，跳过")
+            continue
+        if not account.api_key:
+            logger.warning(f"⚠️  账号 {account.username} 已启用自动续费但未配置 API Key，跳过")
+            continue
+        
+        logger.info(f"\n{'#'*80}")
+        logger.info(f"第 {idx}/{len(accounts)} 个账号: {account.username}")
+        logger.info(f"{'#'*80}")
+        
+        result = check_and_renew_account(account, config)
+        lines.append(f"【{account.username}】 {result['summary']}")
+        
+        # 仅在发生续费或失败时通知，避免高频执行时刷屏
+        if result.get("error") or result.get("renewed") or result.get("failed"):
+            need_notify = True
+    
+    elapsed_time = time.time() - start_time
+    logger.info("\n" + "=" * 80)
+    logger.info(f"🎉 续费检查完成，耗时 {elapsed_time:.1f} 秒")
+    logger.info("=" * 80)
+    
+    if not lines:
+        logger.info("暂无启用自动续费的账号")
+        return
+    
+    report = "\n".join(lines + ["", f"📅 执行时间: {time.strftime('%Y-%m-%d %H:%M:%S')}"])
+    if need_notify:
+        send_notification("雨云自动续费", report)
+    else:
+        logger.info("\n" + report)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,96 @@
+import json
+import logging
+import os
+import threading
+import time
+from dataclasses import asdict, is_dataclass
+from typing import Dict
+
+logger = logging.getLogger(__name__)
+
+
+class RunJournal:
+    """按天记录账号执行结果（追加写 JSONL，任务中断后再次运行可跳过已成功的账号）"""
+    
+    def __init__(self, config: dict):
+        self.enabled = bool(config.get("run_journal", True))
+        self.keep_days = int(config.get("journal_keep_days", 7))
+        
+        # 相对路径以主脚本目录为基准
+        script_dir = os.path.dirname(os.path.abspath(__file__))
+        self.journal_dir = os.path.abspath(
+            os.path.join(script_dir, config.get("journal_dir", "./journal"))
+        )
+        self.path = os.path.join(self.journal_dir, f"{time.strftime('%Y-%m-%d')}.jsonl")
+        self._lock = threading.Lock()
+    
+    def completed(self) -> Dict[str, dict]:
+        """
+        今日已成功的账号
+        
+        Returns:
+            用户名 -> 最近一次成功的执行结果（同一账号以最后一条记录为准）
+        """
+        if not self.enabled or not os.path.exists(self.path):
+            return {}
+        
+        latest: Dict[str, dict] = {}
+        try:
+            with open(self.path, "r", encoding="utf-8") as f:
+                for line in f:
+                    try:
+                        entry = json.loads(line)
+                    except ValueError:
+                        # 进程被杀时最后一行可能不完整
+                        continue
+                    # 逐行跳过格式不正确的记录，不影响其他账号
+                    if not isinstance(entry, dict) or not isinstance(entry.get("username"), str):
+                        continue
+                    latest[entry["username"]] = entry
+        except (OSError, UnicodeDecodeError) as e:
+            logger.warning(f"⚠️  运行日志读取失败，已忽略: {e}")
+            return {}
+        
+        return {
+            name: entry["result"] for name, entry in latest.items()
+            if entry.get("success") and isinstance(entry.get("result"), dict)
+        }
+    
+    def record(self, result):
+        """追加一条执行结果并立即落盘"""
+        if not self.enabled:
+            return
+        
+        data = asdict(result) if is_dataclass(result) else dict(result)
+        entry = {
+            "username": data["username"],
+            "success": result.is_success() if hasattr(result, "is_success") else False,
+            "recorded_at": time.time(),
+            "result": data,
+        }
+        line = json.dumps(entry, ensure_ascii=False) + "\n"
+        
+        with self._lock:
+            try:
+                os.makedirs(self.journal_dir, exist_ok=True)
+                with open(self.path, "a", encoding="utf-8") as f:
+                    f.write(line)
+                    f.flush()
+                    os.fsync(f.fileno())
+            except OSError as e:
+                logger.warning(f"⚠️  运行日志写入失败: {e}")
+    
+    def prune(self):
+        """删除超过保留天数的日志"""
+        if not self.enabled or not os.path.isdir(self.journal_dir):
+            return
+        
+        cutoff = time.time() - self.keep_days * 86400
+        for name in os.listdir(self.journal_dir):
+            path = os.path.join(self.journal_dir, name)
+            if name.endswith(".jsonl") and path != self.path:
+                try:
+                    if os.path.getmtime(path) < cutoff:
+                        os.remove(path)
+                except OSError:
+                    pass
@@ -0,0 +1,56 @@
+import logging
+import random
+import time
+from typing import List, Optional
+
+logger = logging.getLogger(__name__)
+
+
+class JitterSchedule:
+    """
+    账号启动时间表
+    
+    在同一个时间窗口内为每个账号随机分配启动偏移，保留随机性的同时，
+    总等待时间不再随账号数量线性增长。
+    """
+    
+    def __init__(self, count: int, window: float, min_gap: float = 3.0, rng: Optional[random.Random] = None):
+        self.start = time.time()
+        self.window = max(0.0, window)
+        self.offsets = self._plan(count, self.window, max(0.0, min_gap), rng or random.Random())
+    
+    @staticmethod
+    def _plan(count: int, window: float, min_gap: float, rng: random.Random) -> List[float]:
+        """生成递增的随机偏移，相邻账号至少间隔 min_gap 秒"""
+        if count <= 0:
+            return []
+        # 预留最小间隔后在剩余窗口内均匀抽样，再把间隔加回去
+        free = max(0.0, window - min_gap * (count - 1))
+        points = sorted(rng.uniform(0, free) for _ in range(count))
+        return [point + i * min_gap for i, point in enumerate(points)]
+    
+    @classmethod
+    def from_config(cls, count: int, config: dict) -> "JitterSchedule":
+        """按配置创建时间表（窗口 = max_delay 分钟 + 1 分钟）"""
+        window = config["max_delay"] * 60 + 60
+        return cls(count, window, config.get("account_min_gap", 3))
+    
+    def start_time(self, n: int) -> float:
+        """第 n 个（从 0 开始）账号的计划启动时间"""
+        return self.start + self.offsets[n]
+    
+    def describe(self) -> str:
+        """时间表摘要"""
+        if not self.offsets:
+            return "无待处理账号"
+        return f"{len(self.offsets)} 个账号分布在 {self.window / 60:.1f} 分钟窗口内，最晚于 {self.offsets[-1]:.0f} 秒后启动"
+
+
+def wait_until(start_at: Optional[float]):
+    """等待到计划启动时间（已过期则立即返回）"""
+    if start_at is None:
+        return
+    remaining = start_at - time.time()
+    if remaining > 0:
+        logger.info(f"⏳ 按时间表等待 {int(remaining // 60)} 分钟 {int(remaining % 60)} 秒后开始")
+        time.sleep(remaining)
@@ -0,0 +1,124 @@
+import json
+import logging
+import os
+import threading
+import time
+from datetime import datetime
+from typing import Dict, Optional
+
+logger = logging.getLogger(__name__)
+
+# 多个账号（并发模式下多个线程）共用同一缓存文件
+_file_lock = threading.Lock()
+
+
+class ServerCache:
+    """服务器到期信息缓存（服务器 ID → 到期时间与续费价格）"""
+    
+    def __init__(self, config: dict):
+        self.ttl = float(config.get("server_cache_ttl_hours", 72)) * 3600
+        self.enabled = self.ttl > 0
+        
+        # 相对路径以主脚本目录为基准
+        script_dir = os.path.dirname(os.path.abspath(__file__))
+        self.path = os.path.abspath(
+            os.path.join(script_dir, config.get("server_cache_path", "./server_cache.json"))
+        )
+        
+        self._entries: Dict[str, dict] = {}
+        self._updated: Dict[str, dict] = {}
+        self._removed = set()
+        if self.enabled:
+            self._entries = self._read()
+    
+    def _read(self) -> Dict[str, dict]:
+        """读取缓存文件"""
+        if not os.path.exists(self.path):
+            return {}
+        try:
+            with open(self.path, "r", encoding="utf-8") as f:
+                data = json.load(f)
+        except (OSError, ValueError) as e:
+            logger.warning(f"⚠️  服务器缓存读取失败，已忽略: {e}")
+            return {}
+        
+        servers = data.get("servers") if isinstance(data, dict) else None
+        if not isinstance(servers, dict):
+            logger.warning("⚠️  服务器缓存格式无效，已忽略")
+            return {}
+        return servers
+    
+    def get_fresh(self, server_id: int, threshold_days: int) -> Optional[dict]:
+        """
+        获取仍可信的缓存条目
+        
+        仅当缓存未超过有效期且到期时间远离续费阈值时返回，否则需重新查询。
+        """
+        if not self.enabled:
+            return None
+        
+        entry = self._entries.get(str(server_id))
+        if not isinstance(entry, dict):
+            return None
+        
+        # 手工编辑或旧格式的条目视为未命中，重新查询
+        try:
+            if time.time() - float(entry.get("fetched_at", 0)) > self.ttl:
+                return None
+            days_left = (datetime.fromtimestamp(float(entry["exp_ts"])) - datetime.now()).days
+            if not isinstance(entry["exp_date"], str) or not isinstance(entry["renew_prices"], dict):
+                return None
+        except (KeyError, TypeError, ValueError, OverflowError, OSError):
+            return None
+        
+        if days_left <= threshold_days:
+            return None
+        
+        return entry
+    
+    def put(self, server_id: int, exp_date: datetime, exp_date_str: str, renew_prices: dict):
+        """写入查询结果"""
+        if not self.enabled:
+            return
+        
+        entry = {
+            "exp_ts": exp_date.timestamp(),
+            "exp_date": exp_date_str,
+            "renew_prices": renew_prices,
+            "fetched_at": time.time()
+        }
+        key = str(server_id)
+        self._entries[key] = entry
+        self._updated[key] = entry
+        self._removed.discard(key)
+    
+    def invalidate(self, server_id: int):
+        """使缓存失效（如续费后到期时间已变化）"""
+        key = str(server_id)
+        self._entries.pop(key, None)
+        self._updated.pop(key, None)
+        self._removed.add(key)
+    
+    def save(self):
+        """合并本次改动并原子写入缓存文件"""
+        if not self.enabled or not (self._updated or self._removed):
+            return
+        
+        with _file_lock:
+            try:
+                # 重新读取，避免覆盖其他账号的改动
+                entries = self._read()
+                entries.update(self._updated)
+                for key in self._removed:
+                    entries.pop(key, None)
+                
+                os.makedirs(os.path.dirname(self.path), exist_ok=True)
+                tmp_path = f"{self.path}.tmp"
+                with open(tmp_path, "w", encoding="utf-8") as f:
+                    json.dump({"servers": entries}, f, ensure_ascii=False)
+                os.replace(tmp_path, self.path)
+                
+                self._updated.clear()
+                self._removed.clear()
+            except OSError as e:
+                logger.warning(f"⚠️  服务器缓存写入失败: {e}")
@@ -1,8 +1,10 @@
 import logging
+from concurrent.futures import Future, ThreadPoolExecutor
 from datetime import datetime
-from typing import Dict, List
+from typing import Dict, List, Tuple
 
 from api_client import RainyunAPI, RainyunAPIError
+from server_cache import ServerCache
 
 logger = logging.getLogger(__name__)
 
@@ -16,6 +18,8 @@ class ServerManager:
         self.renew_days = config.get("renew_days", 7)
         self.threshold_days = config.get("renew_threshold_days", 3)
         self.min_reserve = config.get("min_points_reserve", 5000)
+        self.detail_concurrency = max(1, int(config.get("renew_detail_concurrency", 4)))
+        self.cache = ServerCache(config)
         
         logger.info("🔧 服务器管理器初始化成功")
         logger.info(f"   续费天数: {self.renew_days} 天")
@@ -29,6 +33,7 @@ class ServerManager:
             "renewed": 0,
             "skipped": 0,
             "failed": 0,
+            "cached": 0,
             "details": []
         }
         
@@ -46,19 +51,32 @@ class ServerManager:
                 logger.info("   暂无服务器需要检查")
                 return result
             
-            # 逐个处理服务器
-            for idx, server_id in enumerate(server_ids, 1):
-                logger.info(f"\n   [{idx}/{len(server_ids)}] 检查服务器 {server_id}")
-                detail = self._process_server(server_id, current_points)
-                result["details"].append(detail)
+            # 并发查询服务器详情；续费判断与扣分仍按顺序在当前线程执行，
+            # 由 current_points 统一记账，保证不会突破保留积分
+            # 到期时间较远且缓存未过期的服务器不再查询
+            workers = min(self.detail_concurrency, len(server_ids))
+            with ThreadPoolExecutor(max_workers=workers, thread_name_prefix="rgs-detail") as executor:
+                sources = []
+                for sid in server_ids:
+                    cached = self.cache.get_fresh(sid, self.threshold_days)
+                    sources.append(cached if cached else executor.submit(self.api.get_server_detail, sid))
                 
-                if detail["action"] == "renewed":
-                    result["renewed"] += 1
-                    current_points = detail["points_after"]
-                elif detail["action"] == "skipped":
-                    result["skipped"] += 1
-                elif detail["action"] == "failed":
-                    result["failed"] += 1
+                for idx, (server_id, source) in enumerate(zip(server_ids, sources), 1):
+                    logger.info(f"\n   [{idx}/{len(server_ids)}] 检查服务器 {server_id}")
+                    if isinstance(source, Future):
+                        detail = self._process_server(server_id, current_points, info_future=source)
+                    else:
+                        detail = self._process_server(server_id, current_points, cached=source)
+                        result["cached"] += 1
+                    result["details"].append(detail)
+                    
+                    if detail["action"] == "renewed":
+                        result["renewed"] += 1
+                        current_points = detail["points_after"]
+                    elif detail["action"] == "skipped":
+                        result["skipped"] += 1
+                    elif detail["action"] == "failed":
+                        result["failed"] += 1
             
             return result
             
@@ -66,9 +84,12 @@ class ServerManager:
             logger.error(f"❌ 服务器检查失败: {e}")
             result["failed"] = result["total"]
             return result
+        finally:
+            self.cache.save()
     
-    def _process_server(self, server_id: int, available_points: int) -> Dict:
-        """处理单个服务器"""
+    def _process_server(self, server_id: int, available_points: int,
+                        info_future: Future = None, cached: dict = None) -> Dict:
+        """处理单个服务器（详情来自并发查询的 info_future 或缓存条目 cached）"""
         detail = {
             "server_id": server_id,
             "action": "skipped",
@@ -76,45 +97,40 @@ class ServerManager:
             "points_cost": 0,
             "points_after": available_points,
             "exp_date": "",
-            "days_left": 0
+            "days_left": 0,
+            "cached": cached is not None
         }
         
         try:
-            # 获取服务器详情
-            info = self.api.get_server_detail(server_id)
-            server_data = info.get("Data", {})
-            renew_prices = info.get("RenewPointPrice", {})
-            
-            # 解析到期时间（支持多种格式）
-            exp_date_raw = server_data.get("ExpDate", "")
-            if not exp_date_raw:
-                detail["action"] = "failed"
-                detail["reason"] = "无法获取到期时间"
-                logger.error(f"   ❌ {detail['reason']}")
-                return detail
-            
-            # 判断是时间戳还是字符串
-            if isinstance(exp_date_raw, int):
-                # 时间戳格式（秒或毫秒）
-                if exp_date_raw > 10000000000:  # 毫秒级时间戳
-                    exp_date = datetime.fromtimestamp(exp_date_raw / 1000)
-                else:  # 秒级时间戳
-                    exp_date = datetime.fromtimestamp(exp_date_raw)
-                exp_date_str = exp_date.strftime("%Y-%m-%d %H:%M:%S")
+            if cached is not None:
+                # 使用缓存的到期信息
+                exp_date = datetime.fromtimestamp(cached["exp_ts"])
+                exp_date_str = cached["exp_date"]
+                renew_prices = cached["renew_prices"]
+                logger.info("   📦 使用缓存的服务器信息")
             else:
-                # 字符串格式
-                exp_date_str = str(exp_date_raw)
+                # 获取服务器详情
+                info = info_future.result()
+                server_data = info.get("Data", {})
+                renew_prices = info.get("RenewPointPrice", {})
+                
+                # 解析到期时间（支持多种格式）
+                exp_date_raw = server_data.get("ExpDate", "")
+                if not exp_date_raw:
+                    detail["action"] = "failed"
+                    detail["reason"] = "无法获取到期时间"
+                    logger.error(f"   ❌ {detail['reason']}")
+                    return detail
+                
                 try:
-                    exp_date = datetime.strptime(exp_date_str, "%Y-%m-%d %H:%M:%S")
+                    exp_date, exp_date_str = parse_exp_date(exp_date_raw)
                 except ValueError:
-                    # 尝试其他常见格式
-                    try:
-                        exp_date = datetime.strptime(exp_date_str, "%Y-%m-%d")
-                    except ValueError:
-                        detail["action"] = "failed"
-                        detail["reason"] = f"无法解析到期时间格式: {exp_date_str}"
-                        logger.error(f"   ❌ {detail['reason']}")
-                        return detail
+                    detail["action"] = "failed"
+                    detail["reason"] = f"无法解析到期时间格式: {exp_date_raw}"
+                    logger.error(f"   ❌ {detail['reason']}")
+                    return detail
+                
+                self.cache.put(server_id, exp_date, exp_date_str, renew_prices)
             
             days_left = (exp_date - datetime.now()).days
             
@@ -152,6 +168,7 @@ class ServerManager:
             # 执行续费
             logger.info(f"   🔄 开始续费...")
             self.api.renew_server(server_id, self.renew_days)
+            self.cache.invalidate(server_id)
             
             detail["action"] = "renewed"
             detail["points_cost"] = renew_cost
@@ -184,8 +201,10 @@ class ServerManager:
             f"✅ 已续费: {result['renewed']} 台",
             f"⏭️  跳过: {result['skipped']} 台",
             f"❌ 失败: {result['failed']} 台",
-            ""
         ]
+        if result.get("cached"):
+            lines.append(f"📦 缓存: {result['cached']} 台（未重新查询）")
+        lines.append("")
         
         if not result["details"]:
             lines.append("暂无服务器")
@@ -209,8 +228,37 @@ class ServerManager:
                 if days_left > 0:
                     lines.append(f"   剩余天数: {days_left} 天")
             else:
-                lines.append(f"⚪ 服务器 {server_id}: {reason}")
+                cached_mark = "（缓存）" if detail.get("cached") else ""
+                lines.append(f"⚪ 服务器 {server_id}: {reason}{cached_mark}")
                 if exp_date:
                     lines.append(f"   到期时间: {exp_date}")
         
         return "\n".join(lines)
+
+
+def parse_exp_date(exp_date_raw) -> Tuple[datetime, str]:
+    """
+    解析到期时间（支持秒/毫秒时间戳与常见字符串格式）
+    
+    Returns:
+        (到期时间, 格式化字符串)
+    
+    Raises:
+        ValueError: 无法解析
+    """
+    # 判断是时间戳还是字符串
+    if isinstance(exp_date_raw, int):
+        # 时间戳格式（秒或毫秒）
+        if exp_date_raw > 10000000000:  # 毫秒级时间戳
+            exp_date = datetime.fromtimestamp(exp_date_raw / 1000)
+        else:  # 秒级时间戳
+            exp_date = datetime.fromtimestamp(exp_date_raw)
+        return exp_date, exp_date.strftime("%Y-%m-%d %H:%M:%S")
+    
+    # 字符串格式
+    exp_date_str = str(exp_date_raw)
+    try:
+        return datetime.strptime(exp_date_str, "%Y-%m-%d %H:%M:%S"), exp_date_str
+    except ValueError:
+        # 尝试其他常见格式
+        return datetime.strptime(exp_date_str, "%Y-%m-%d"), exp_date_str
@@ -0,0 +1,243 @@
+import base64
+import hashlib
+import json
+import logging
+import os
+import time
+from typing import Optional
+
+from selenium.common import TimeoutException
+from selenium.webdriver.common.by import By
+from selenium.webdriver.support import expected_conditions as EC
+from selenium.webdriver.support.wait import WebDriverWait
+
+logger = logging.getLogger(__name__)
+
+try:
+    from cryptography.fernet import Fernet, InvalidToken
+    from cryptography.hazmat.primitives import hashes
+    from cryptography.hazmat.primitives.kdf.pbkdf2 import PBKDF2HMAC
+    HAS_CRYPTOGRAPHY = True
+except ImportError:
+    HAS_CRYPTOGRAPHY = False
+
+APP_ORIGIN = "https://app.rainyun.com"
+DASHBOARD_URL = f"{APP_ORIGIN}/dashboard"
+USER_NAV_XPATH = '//*[@id="app"]/div[1]/nav/div[1]/ul/div[6]/li/a/div/div/p'
+
+# Network.setCookies 接受的 Cookie 字段
+COOKIE_FIELDS = ("name", "value", "domain", "path", "secure", "httpOnly", "sameSite", "expires")
+
+# 在页面脚本执行前写回 localStorage（每个标签页只写一次）
+RESTORE_STORAGE_JS = """
+(function () {
+    if (location.origin !== %(origin)s || sessionStorage.getItem('__rainyun_restored')) return;
+    var items = %(items)s;
+    Object.keys(items).forEach(function (k) { localStorage.setItem(k, items[k]); });
+    sessionStorage.setItem('__rainyun_restored', '1');
+})();
+"""
+
+
+class SessionStore:
+    """账号会话持久化（加密保存 Cookie 与 localStorage，复用登录态）"""
+    
+    SCHEMA_VERSION = 1
+    KDF_ITERATIONS = 200_000
+    
+    def __init__(self, config: dict):
+        self.enabled = bool(config.get("session_persist", True))
+        self.timeout = config.get("timeout", 20)
+        
+        # 相对路径以主脚本目录为基准
+        script_dir = os.path.dirname(os.path.abspath(__file__))
+        self.session_dir = os.path.abspath(
+            os.path.join(script_dir, config.get("session_dir", "./sessions"))
+        )
+        
+        if self.enabled and not HAS_CRYPTOGRAPHY:
+            logger.warning("⚠️  未安装 cryptography，会话持久化已禁用（pip3 install cryptography）")
+            self.enabled = False
+    
+    def _path(self, username: str) -> str:
+        """会话文件路径（文件名不暴露账号）"""
+        digest = hashlib.sha256(username.encode("utf-8")).hexdigest()[:32]
+        return os.path.join(self.session_dir, f"{digest}.session")
+    
+    def _fernet(self, password: str, salt: bytes) -> "Fernet":
+        """由账号密码派生加密密钥，密码变更后旧会话自动失效"""
+        kdf = PBKDF2HMAC(
+            algorithm=hashes.SHA256(),
+            length=32,
+            salt=salt,
+            iterations=self.KDF_ITERATIONS,
+        )
+        return Fernet(base64.urlsafe_b64encode(kdf.derive(password.encode("utf-8"))))
+    
+    def _load(self, username: str, password: str) -> Optional[dict]:
+        """读取并解密会话"""
+        path = self._path(username)
+        if not os.path.exists(path):
+            return None
+        
+        try:
+            with open(path, "r", encoding="utf-8") as f:
+                envelope = json.load(f)
+            if not isinstance(envelope, dict):
+                raise ValueError("会话文件格式无效")
+            salt = base64.b64decode(envelope["salt"])
+            token = envelope["token"].encode("ascii")
+            data = json.loads(self._fernet(password, salt).decrypt(token))
+            if not isinstance(data, dict):
+                raise ValueError("会话内容格式无效")
+        except (InvalidToken, KeyError, ValueError, TypeError, AttributeError, OSError) as e:
+            # 损坏或格式不正确的会话视为未命中，删除后重新登录
+            logger.warning(f"⚠️  会话文件无效，已忽略: {type(e).__name__}")
+            self.clear(username)
+            return None
+        
+        if data.get("version") != self.SCHEMA_VERSION or data.get("username") != username:
+            return None
+        if not isinstance(data.get("cookies", []), list) or not isinstance(data.get("local_storage", {}), dict):
+            logger.warning("⚠️  会话文件无效，已忽略: 字段格式错误")
+            self.clear(username)
+            return None
+        return data
+    
+    def _dump(self, username: str, password: str, data: dict):
+        """加密并原子写入会话"""
+        os.makedirs(self.session_dir, exist_ok=True)
+        salt = os.urandom(16)
+        token = self._fernet(password, salt).encrypt(json.dumps(data).encode("utf-8"))
+        envelope = {
+            "salt": base64.b64encode(salt).decode("ascii"),
+            "token": token.decode("ascii"),
+        }
+        
+        path = self._path(username)
+        tmp_path = f"{path}.tmp"
+        with open(tmp_path, "w", encoding="utf-8") as f:
+            json.dump(envelope, f)
+        os.chmod(tmp_path, 0o600)
+        os.replace(tmp_path, path)
+    
+    def save(self, driver, username: str, password: str) -> bool:
+        """保存当前浏览器的登录会话"""
+        if not self.enabled:
+            return False
+        
+        try:
+            cookies = driver.execute_cdp_cmd("Network.getAllCookies", {}).get("cookies", [])
+            cookies = [
+                {k: c[k] for k in COOKIE_FIELDS if k in c}
+                for c in cookies if "rainyun" in c.get("domain", "")
+            ]
+            local_storage = {}
+            if driver.current_url.startswith(APP_ORIGIN):
+                local_storage = driver.execute_script(
+                    "return Object.assign({}, window.localStorage);"
+                ) or {}
+            
+            self._dump(username, password, {
+                "version": self.SCHEMA_VERSION,
+                "username": username,
+                "saved_at": int(time.time()),
+                "cookies": cookies,
+                "local_storage": local_storage,
+            })
+            logger.info(f"💾 登录会话已保存（{len(cookies)} 个 Cookie）")
+            return True
+        except Exception as e:
+            logger.warning(f"⚠️  保存登录会话失败: {e}")
+            return False
+    
+    def restore(self, driver, username: str, password: str) -> bool:
+        """
+        恢复登录会话并校验是否仍然有效
+        
+        Returns:
+            True 表示已处于登录状态，可跳过 do_login()
+        """
+        if not self.enabled:
+            return False
+        
+        data = self._load(username, password)
+        if not data:
+            logger.info("🔑 无已保存的登录会话")
+            return False
+        
+        logger.info("🔑 尝试恢复已保存的登录会话...")
+        script_id = None
+        expired = False
+        try:
+            if data.get("cookies"):
+                driver.execute_cdp_cmd("Network.enable", {})
+                driver.execute_cdp_cmd("Network.setCookies", {"cookies": data["cookies"]})
+            
+            if data.get("local_storage"):
+                source = RESTORE_STORAGE_JS % {
+                    "origin": json.dumps(APP_ORIGIN),
+                    "items": json.dumps(data["local_storage"]),
+                }
+                script_id = driver.execute_cdp_cmd(
+                    "Page.addScriptToEvaluateOnNewDocument", {"source": source}
+                ).get("identifier")
+            
+            driver.get(DASHBOARD_URL)
+            WebDriverWait(driver, self.timeout).until(EC.any_of(
+                EC.url_contains("/auth/login"),
+                EC.presence_of_element_located((By.XPATH, USER_NAV_XPATH))
+            ))
+            
+            current_url = driver.current_url
+            if "dashboard" in current_url and "/auth/login" not in current_url:
+                logger.info("✅ 登录会话有效，跳过登录")
+                return True
+            
+            if "/auth/login" in current_url:
+                expired = True
+                logger.info("⌛ 登录会话已过期，重新登录")
+            else:
+                logger.info("⌛ 登录会话状态未知，本次重新登录（保留会话文件）")
+        except TimeoutException:
+            logger.info("⌛ 登录会话校验超时，本次重新登录（保留会话文件）")
+        except Exception as e:
+            logger.warning(f"⚠️  恢复登录会话失败: {e}")
+        finally:
+            if script_id:
+                try:
+                    driver.execute_cdp_cmd("Page.removeScriptToEvaluateOnNewDocument", {"identifier": script_id})
+                except Exception:
+                    pass
+        
+        # 仅在确认跳转到登录页时删除会话文件（超时等情况会话可能仍然有效）
+        if expired:
+            self.clear(username)
+        # 清除浏览器中的残留状态，避免影响正常登录
+        try:
+            driver.execute_cdp_cmd("Network.clearBrowserCookies", {})
+        except Exception:
+            pass
+        return False
+    
+    def load_cookies(self, username: str, password: str) -> Optional[dict]:
+        """读取已保存会话的 Cookie（name -> value），供 HTTP 请求复用登录态"""
+        if not self.enabled:
+            return None
+        
+        data = self._load(username, password)
+        if not data or not data.get("cookies"):
+            return None
+        return {
+            c["name"]: c["value"] for c in data["cookies"]
+            if isinstance(c, dict) and "name" in c and "value" in c
+        }
+    
+    def clear(self, username: str):
+        """删除已保存的会话"""
+        try:
+            os.remove(self._path(username))
+        except FileNotFoundError:
+            pass
+        except OSError as e:
+            logger.warning(f"⚠️  删除会话文件失败: {e}")
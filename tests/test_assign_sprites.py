@@ -0,0 +1,42 @@
+import pytest
+
+from captcha import assign_sprites, check_answer
+
+BBOXES = [(0, 0, 10, 10), (20, 0, 30, 10), (40, 0, 50, 10), (60, 0, 70, 10)]
+
+
+def test_global_assignment_beats_greedy():
+    # 贪心会把碎片 1 分到区域 0，导致碎片 2 只能得到低分
+    matrix = [
+        [0.9, 0.8, 0.1, 0.0],
+        [0.85, 0.1, 0.1, 0.0],
+        [0.0, 0.0, 0.7, 0.2],
+    ]
+    result, margin = assign_sprites(matrix, BBOXES)
+    assert result["sprite_1.position"] == "25,5"
+    assert result["sprite_2.position"] == "5,5"
+    assert result["sprite_3.position"] == "45,5"
+    assert result["sprite_2.similarity"] == 0.85
+    # 最优 0.8+0.85+0.7=2.35，次优 0.8+0.85+0.2=1.85
+    assert margin == pytest.approx(0.5)
+    assert check_answer(result, 0.4)
+    assert not check_answer(result, 0.75)
+
+
+def test_margin_against_second_best_permutation():
+    matrix = [[0.5, 0.1, 0.1], [0.1, 0.6, 0.1], [0.1, 0.1, 0.7]]
+    result, margin = assign_sprites(matrix, BBOXES[:3])
+    assert result["sprite_3.position"] == "45,5"
+    # 次优方案交换碎片 1、2：0.1+0.1+0.7=0.9
+    assert margin == pytest.approx(1.8 - 0.9)
+
+
+def test_single_permutation_margin_is_total_score():
+    
+    result, margin = assign_sprites([[0.5]], BBOXES[:1])
+    assert margin == pytest.approx(0.5)
+
+
+def test_too_few_regions():
+    assert assign_sprites([[0.5, 0.5]] * 3, BBOXES[:2]) == ({}, 0.0)
+    assert not check_answer({}, 0.4)
@@ -0,0 +1,96 @@
+from types import SimpleNamespace
+
+import pytest
+
+from browser_pool import BrowserPool
+
+
+class _FakeDriver:
+    def __init__(self, fail_on=()):
+        self.fail_on = set(fail_on)
+        self.current_window_handle = "home"
+        self.window_handles = ["home"]
+        self.cdp = []
+        self.quit_called = False
+        self.switch_to = SimpleNamespace(window=self._switch)
+    
+    def execute_cdp_cmd(self, cmd, params):
+        self.cdp.append(cmd)
+        if cmd in self.fail_on:
+            raise RuntimeError(cmd)
+        if cmd == "Target.createBrowserContext":
+            return {"browserContextId": "ctx"}
+        if cmd == "Target.createTarget":
+            self.window_handles.append("tab")
+            return {"targetId": "tab"}
+        return {}
+    
+    def _switch(self, handle):
+        if "switch" in self.fail_on:
+            raise RuntimeError("switch")
+        self.current_window_handle = handle
+    
+    def get(self, url):
+        pass
+    
+    def quit(self):
+        self.quit_called = True
+
+
+CONFIG = {"reuse_browser": True}
+
+
+def _pool(*drivers):
+    launched = list(drivers)
+    return BrowserPool(), (lambda config: launched.pop(0)), launched
+
+
+def test_context_lease():
+    driver = _FakeDriver()
+    pool, launch, _ = _pool(driver)
+    lease = pool.acquire(CONFIG, launch, lambda d: None)
+    assert (lease.driver, lease.context_id, lease.target_id) == (driver, "ctx", "tab")
+
+
+@pytest.mark.parametrize("fail_on", ["Target.createBrowserContext", "Target.createTarget"])
+def test_context_failure_falls_back_to_home_tab(fail_on):
+    driver = _FakeDriver([fail_on])
+    pool, launch, _ = _pool(driver)
+    lease = pool.acquire(CONFIG, launch, lambda d: None)
+    assert lease.driver is driver and lease.context_id is None
+    assert driver.current_window_handle == "home"
+    assert "Network.clearBrowserCookies" in driver.cdp
+    if fail_on == "Target.createTarget":
+        assert "Target.disposeBrowserContext" in driver.cdp
+
+
+def test_prepare_failure_falls_back_and_prepares_home_once():
+    driver = _FakeDriver()
+    prepared = []
+    
+    def prepare(d):
+        prepared.append(d.current_window_handle)
+        if d.current_window_handle == "tab":
+            raise RuntimeError("prepare")
+    
+    pool, launch, _ = _pool(driver)
+    lease = pool.acquire(CONFIG, launch, prepare)
+    assert lease.context_id is None
+    assert prepared == ["tab", "home"]
+    assert "Target.disposeBrowserContext" in driver.cdp
+    
+    pool.release(lease)
+    pool.acquire(CONFIG, launch, prepare)
+    assert prepared == ["tab", "home", "tab"]
+
+
+def test_broken_browser_is_restarted():
+    broken = _FakeDriver(["Target.createBrowserContext", "switch"])
+    fresh = _FakeDriver(["Target.createBrowserContext"])
+    pool, launch, launched = _pool(broken, fresh)
+    lease = pool.acquire(CONFIG, launch, lambda d: None)
+    assert lease.driver is fresh
+    assert broken.quit_called and not launched
+    
+    pool.close_all()
+    assert fresh.quit_called
@@ -0,0 +1,73 @@
+from concurrent.futures import Future
+
+import numpy as np
+
+from captcha import detect_patterns
+from captcha_cache import CaptchaCache, image_hash
+
+
+def _done(value) -> Future:
+    future = Future()
+    future.set_result(value)
+    return future
+
+
+class _CountingDetector:
+    def __init__(self, bboxes):
+        self.bboxes = bboxes
+        self.calls = 0
+    
+    def detection(self, img):
+        self.calls += 1
+        return self.bboxes
+
+
+class _Ctx:
+    def __init__(self, det):
+        self.det = det
+
+
+def test_lru_eviction_keeps_recently_used(tmp_path):
+    cache = CaptchaCache(str(tmp_path / "cache.sqlite3"), max_entries=2)
+    cache.put("a", 1)
+    cache.put("b", 2)
+    assert cache.get("a") == 1  # a 变为最近使用
+    cache.put("c", 3)
+    
+    assert cache.get("a") == 1
+    assert cache.get("b") is None
+    assert cache.get("c") == 3
+
+
+def test_delete_and_numpy_values(tmp_path):
+    cache = CaptchaCache(str(tmp_path / "cache.sqlite3"), max_entries=10)
+    cache.put("x", {"sim": np.float32(0.5)})
+    assert cache.get("x") == {"sim": 0.5}
+    cache.delete("x")
+    assert cache.get("x") is None
+
+
+def test_disabled_when_size_is_zero():
+    assert CaptchaCache.from_config({"captcha_cache_size": 0}) is None
+
+
+def test_image_hash_is_stable_across_color_and_gray():
+    rng = np.random.default_rng(0)
+    image = rng.integers(0, 255, size=(48, 96, 3), dtype=np.uint8)
+    assert image_hash(image) == image_hash(image.copy())
+    assert len(image_hash(image)) == 16
+
+
+def test_detect_patterns_uses_and_fills_bbox_cache(tmp_path):
+    cache = CaptchaCache(str(tmp_path / "cache.sqlite3"), max_entries=10)
+    det = _CountingDetector([[1, 2, 3, 4]])
+    ctx = _Ctx(det)
+    
+    assert detect_patterns(ctx, _done(b"img"), cache, "abc") == [[1, 2, 3, 4]]
+    assert detect_patterns(ctx, _done(b"img"), cache, "abc") == [[1, 2, 3, 4]]
+    assert det.calls == 1
+    
+    # 失效使用同一个哈希键
+    cache.delete("bbox:abc")
+    detect_patterns(ctx, _done(b"img"), cache, "abc")
+    assert det.calls == 2
@@ -0,0 +1,73 @@
+import os
+import zipfile
+
+import pytest
+
+from captcha_recorder import CaptchaRecorder, read_archive
+
+
+@pytest.fixture
+def path(tmp_path):
+    return str(tmp_path / "records" / "captcha.zip")
+
+
+def test_record_and_read_archive(path):
+    recorder = CaptchaRecorder(path, max_bytes=10 * 1024 * 1024, keep=2)
+    recorder.record({"result": "success"}, b"bg0", b"sp0")
+    recorder.record({"result": "failed", "margin": 0.5}, b"bg1", b"sp1")
+    
+    entries = list(read_archive(path))
+    assert [m["id"] for m, _, _ in entries] == ["000000", "000001"]
+    assert entries[1][0]["margin"] == 0.5
+    assert entries[1][1:] == (b"bg1", b"sp1")
+
+
+def test_rotation_keeps_limited_archives(path):
+    recorder = CaptchaRecorder(path, max_bytes=1, keep=2)
+    for i in range(4):
+        recorder.record({"n": i}, b"bg", b"sp")
+    
+    assert [m["n"] for m, _, _ in read_archive(path)] == [3]
+    assert [m["n"] for m, _, _ in read_archive(f"{path}.1")] == [2]
+    assert [m["n"] for m, _, _ in read_archive(f"{path}.2")] == [1]
+    assert not os.path.exists(f"{path}.3")
+
+
+def test_rotation_with_keep_zero_discards(path):
+    recorder = CaptchaRecorder(path, max_bytes=1, keep=0)
+    recorder.record({"n": 0}, b"bg", b"sp")
+    recorder.record({"n": 1}, b"bg", b"sp")
+    assert [m["n"] for m, _, _ in read_archive(path)] == [1]
+    assert not os.path.exists(f"{path}.1")
+
+
+def test_corrupt_archive_is_moved_aside(path):
+    recorder = CaptchaRecorder(path, max_bytes=10 * 1024 * 1024, keep=2)
+    recorder.record({"n": 0}, b"bg", b"sp")
+    
+    # 破坏中央目录（保留结束记录，zipfile 会抛出 BadZipFile）
+    with open(path, "r+b") as f:
+        data = bytearray(f.read())
+        offset = data.rfind(b"PK\x01\x02")
+        data[offset:offset + 4] = b"XXXX"
+        f.seek(0)
+        f.write(data)
+    with pytest.raises(zipfile.BadZipFile):
+        zipfile.ZipFile(path)
+    
+    recorder.record({"n": 1}, b"bg", b"sp")
+    
+    assert [m["n"] for m, _, _ in read_archive(path)] == [1]
+    corrupt = [n for n in os.listdir(os.path.dirname(path)) if ".corrupt-" in n]
+    assert len(corrupt) == 1
+
+
+def test_truncated_archive_is_moved_aside(path):
+    recorder = CaptchaRecorder(path, max_bytes=10 * 1024 * 1024, keep=2)
+    recorder.record({"n": 0}, b"bg", b"sp")
+    with open(path, "r+b") as f:
+        f.truncate(os.path.getsize(path) // 2)
+    
+    recorder.record({"n": 1}, b"bg", b"sp")
+    
+    assert [m["n"] for m, _, _ in read_archive(path)] == [1]
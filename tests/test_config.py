@@ -0,0 +1,19 @@
+import logging
+
+from config import Config
+
+
+def test_legacy_similarity_threshold_logs_migration_note(monkeypatch, caplog):
+    monkeypatch.setenv("RAINYUN_CONFIG", '{"similarity_threshold": 0.3}')
+    with caplog.at_level(logging.WARNING, logger="config"):
+        config = Config()
+    assert config["match_confidence_threshold"] == 0.4
+    assert "match_confidence_threshold" in caplog.text
+
+
+def test_match_confidence_threshold_without_note(monkeypatch, caplog):
+    monkeypatch.setenv("RAINYUN_CONFIG", '{"match_confidence_threshold": 0.3}')
+    with caplog.at_level(logging.WARNING, logger="config"):
+        config = Config()
+    assert config["match_confidence_threshold"] == 0.3
+    assert "similarity_threshold" not in caplog.text
@@ -0,0 +1,58 @@
+import threading
+from http.server import BaseHTTPRequestHandler, HTTPServer
+
+import pytest
+
+import http_pool
+
+
+class _Handler(BaseHTTPRequestHandler):
+    """第一个请求下发 Cookie，之后的请求回显收到的 Cookie 头"""
+    
+    def do_GET(self):
+        body = (self.headers.get("Cookie") or "").encode("utf-8")
+        self.send_response(200)
+        if self.path == "/login":
+            self.send_header("Set-Cookie", "rain-session=account-a; Path=/")
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+    
+    def log_message(self, *args):
+        pass
+
+
+@pytest.fixture
+def server():
+    httpd = HTTPServer(("127.0.0.1", 0), _Handler)
+    thread = threading.Thread(target=httpd.serve_forever, daemon=True)
+    thread.start()
+    yield f"http://127.0.0.1:{httpd.server_address[1]}"
+    httpd.shutdown()
+    httpd.server_close()
+
+
+@pytest.fixture
+def session():
+    http_pool.close_session()
+    yield http_pool.get_session()
+    http_pool.close_session()
+
+
+def test_response_cookies_are_not_sent_with_next_account_request(server, session):
+    # 账号 A 的请求收到服务端下发的 Cookie
+    session.get(f"{server}/login", cookies={"token": "a"}, timeout=5)
+    
+    # 账号 B 的请求既不应带上 A 的响应 Cookie，也不应带上 A 的请求 Cookie
+    received = session.get(f"{server}/echo", timeout=5).text
+    assert received == ""
+    assert len(session.cookies) == 0
+
+
+def test_per_request_cookies_are_still_sent(server, session):
+    received = session.get(f"{server}/echo", cookies={"token": "b"}, timeout=5).text
+    assert received == "token=b"
+
+
+def test_session_is_shared(session):
+    assert http_pool.get_session() is session
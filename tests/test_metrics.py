@@ -0,0 +1,60 @@
+import json
+
+import pytest
+
+from metrics import RunMetrics, format_prometheus, normalize_reason
+
+
+@pytest.mark.parametrize("reason, code", [
+    ("超时", "timeout"),
+    ("图案检测失败: CUDA error at 0x7f3a", "detect_error"),
+    ("检测区域不足（2 个）", "insufficient_regions"),
+    ("验证码验证失败", "rejected"),
+    ("无法从 style 中解析 URL: background: none", "other"),
+    ("", "other"),
+])
+def test_normalize_reason_maps_to_fixed_codes(reason, code):
+    assert normalize_reason(reason) == code
+
+
+def _record():
+    metrics = RunMetrics()
+    session = metrics.captcha_session("a", "login")
+    session.record("detect", 0.5)
+    session.fail("图案检测失败: boom \"quoted\"\nnext")
+    session.start_attempt()
+    session.record("detect", 0.25)
+    session.fail("图案检测失败: other text")
+    session.start_attempt()
+    session.finish(True)
+    accounts = [
+        {"login_success": True, "sign_in_success": True},
+        {"already_signed": True},
+        {"login_success": False},
+    ]
+    return metrics.build_record(accounts)
+
+
+def test_format_prometheus_aggregates_failures_and_stages():
+    text = format_prometheus(_record())
+    assert 'rainyun_accounts{result="success"} 2' in text
+    assert 'rainyun_accounts{result="failed"} 1' in text
+    assert 'rainyun_captcha_sessions{outcome="success"} 1' in text
+    assert "rainyun_captcha_attempts 3" in text
+    assert 'rainyun_captcha_attempt_failures{reason="detect_error"} 2' in text
+    assert 'rainyun_captcha_stage_seconds_sum{stage="detect"} 0.7500' in text
+    assert 'rainyun_captcha_stage_seconds_count{stage="detect"} 2' in text
+    assert "boom" not in text
+    assert text.endswith("\n")
+
+
+def test_export_resolves_relative_dir_against_script_dir(tmp_path, monkeypatch):
+    import metrics
+    
+    monkeypatch.setattr(metrics, "__file__", str(tmp_path / "metrics.py"))
+    monkeypatch.chdir(tmp_path.parent)
+    RunMetrics().export([], {"metrics_dir": "./out"})
+    
+    data = json.loads((tmp_path / "out" / "rainyun_run.json").read_text(encoding="utf-8"))
+    assert data["accounts"] == []
+    assert (tmp_path / "out" / "rainyun.prom").exists()
@@ -0,0 +1,72 @@
+import threading
+from types import SimpleNamespace
+
+import cv2
+import numpy as np
+
+from captcha import check_captcha, classify_many, prefilter_sprite
+from model_registry import SharedModel
+
+
+def _blank():
+    return np.full((60, 60, 3), 255, dtype=np.uint8)
+
+
+def _two_parts():
+    img = _blank()
+    cv2.rectangle(img, (6, 6), (24, 50), (0, 0, 0), 3)
+    cv2.circle(img, (42, 30), 12, (0, 0, 0), -1)
+    return img
+
+
+def _single_bar():
+    img = _blank()
+    cv2.rectangle(img, (27, 8), (33, 52), (0, 0, 0), -1)
+    return img
+
+
+class _FakeOcr:
+    def __init__(self, answer="猫"):
+        self.answer = answer
+        self.calls = 0
+    
+    def classification(self, img, **kwargs):
+        self.calls += 1
+        return self.answer
+
+
+def test_prefilter_verdicts():
+    assert prefilter_sprite(_blank()) is False
+    assert prefilter_sprite(_two_parts()) is True
+    assert prefilter_sprite(_single_bar()) is None
+
+
+def test_classify_many_uses_single_lock_on_shared_model():
+    model = SharedModel("ocr", _FakeOcr())
+    acquired = []
+    
+    class _CountingLock:
+        def __init__(self):
+            self._lock = threading.Lock()
+        
+        def __enter__(self):
+            acquired.append(1)
+            return self._lock.__enter__()
+        
+        def __exit__(self, *exc):
+            return self._lock.__exit__(*exc)
+    
+    model._lock = _CountingLock()
+    assert classify_many(model, [b"a", b"b", b"c"]) == ["猫", "猫", "猫"]
+    assert len(acquired) == 1
+    assert classify_many(_FakeOcr("1"), [b"a", b"b"]) == ["1", "1"]
+
+
+def test_check_captcha_only_sends_undecided_sprites_to_ocr():
+    ocr = _FakeOcr()
+    ctx = SimpleNamespace(ocr=ocr)
+    assert check_captcha(ctx, [_two_parts(), _single_bar(), _two_parts()]) is True
+    assert ocr.calls == 1
+    
+    assert check_captcha(SimpleNamespace(ocr=_FakeOcr("1")), [_single_bar()] * 3) is False
+    assert check_captcha(ctx, [_two_parts(), _blank(), _two_parts()]) is False
@@ -0,0 +1,71 @@
+import os
+import time
+from dataclasses import dataclass
+
+import pytest
+
+from run_journal import RunJournal
+
+
+@dataclass
+class _Result:
+    username: str
+    ok: bool = True
+    
+    def is_success(self) -> bool:
+        return self.ok
+
+
+@pytest.fixture
+def journal(tmp_path):
+    return RunJournal({"journal_dir": str(tmp_path), "journal_keep_days": 7})
+
+
+def test_completed_returns_successful_accounts(journal):
+    journal.record(_Result("a"))
+    journal.record(_Result("b", ok=False))
+    assert set(journal.completed()) == {"a"}
+    assert journal.completed()["a"] == {"username": "a", "ok": True}
+
+
+def test_last_record_wins(journal):
+    journal.record(_Result("a"))
+    journal.record(_Result("a", ok=False))
+    journal.record(_Result("b", ok=False))
+    journal.record(_Result("b"))
+    assert set(journal.completed()) == {"b"}
+
+
+def test_malformed_lines_are_skipped_individually(journal):
+    journal.record(_Result("a"))
+    with open(journal.path, "a", encoding="utf-8") as f:
+        f.write('[]\n"x"\nnull\n{"no_username": 1}\n{"username": "c", "success": true}\n{"username": "d", "succ\n')
+    journal.record(_Result("b"))
+    assert set(journal.completed()) == {"a", "b"}
+
+
+def test_missing_file_and_disabled(tmp_path):
+    assert RunJournal({"journal_dir": str(tmp_path)}).completed() == {}
+    disabled = RunJournal({"journal_dir": str(tmp_path), "run_journal": False})
+    disabled.record(_Result("a"))
+    assert disabled.completed() == {}
+    assert not os.path.exists(disabled.path)
+
+
+def test_prune_removes_old_journals_only(journal, tmp_path):
+    journal.record(_Result("a"))
+    old = tmp_path / "2000-01-01.jsonl"
+    recent = tmp_path / "recent.jsonl"
+    other = tmp_path / "notes.txt"
+    for path in (old, recent, other):
+        path.write_text("{}\n")
+    stale = time.time() - 30 * 86400
+    os.utime(old, (stale, stale))
+    os.utime(other, (stale, stale))
+    
+    journal.prune()
+    
+    assert not old.exists()
+    assert recent.exists()
+    assert other.exists()
+    assert os.path.exists(journal.path)
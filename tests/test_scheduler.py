@@ -0,0 +1,51 @@
+import random
+import time
+
+import pytest
+
+import scheduler
+from scheduler import JitterSchedule, wait_until
+
+
+@pytest.mark.parametrize("count, window, min_gap", [
+    (1, 360, 3),
+    (5, 360, 3),
+    (50, 360, 3),
+    (10, 20, 3),   # 窗口不足以容纳最小间隔
+    (4, 0, 0),
+])
+def test_offsets_are_sorted_and_gapped(count, window, min_gap):
+    schedule = JitterSchedule(count, window, min_gap, random.Random(1))
+    offsets = schedule.offsets
+    assert len(offsets) == count
+    assert offsets[0] >= 0
+    assert all(b - a >= min_gap - 1e-9 for a, b in zip(offsets, offsets[1:]))
+    assert offsets[-1] <= max(window, min_gap * (count - 1)) + 1e-9
+
+
+def test_offsets_stay_within_window():
+    schedule = JitterSchedule(20, 600, 3, random.Random(7))
+    assert schedule.offsets[-1] <= 600
+    assert schedule.start_time(0) == schedule.start + schedule.offsets[0]
+
+
+def test_empty_schedule():
+    schedule = JitterSchedule(0, 600)
+    assert schedule.offsets == []
+    assert schedule.describe() == "无待处理账号"
+
+
+def test_from_config_window():
+    schedule = JitterSchedule.from_config(3, {"max_delay": 5, "account_min_gap": 10})
+    assert schedule.window == 360
+    assert all(b - a >= 10 - 1e-9 for a, b in zip(schedule.offsets, schedule.offsets[1:]))
+
+
+def test_wait_until(monkeypatch):
+    slept = []
+    monkeypatch.setattr(scheduler.time, "sleep", slept.append)
+    wait_until(None)
+    wait_until(time.time() - 5)
+    assert slept == []
+    wait_until(time.time() + 30)
+    assert len(slept) == 1 and 29 < slept[0] <= 30
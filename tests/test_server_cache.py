@@ -0,0 +1,80 @@
+import json
+import time
+from datetime import datetime, timedelta
+
+import pytest
+
+from server_cache import ServerCache
+
+
+@pytest.fixture
+def config(tmp_path):
+    return {"server_cache_ttl_hours": 72, "server_cache_path": str(tmp_path / "server_cache.json")}
+
+
+def _put(cache, server_id, days):
+    exp_date = datetime.now() + timedelta(days=days)
+    cache.put(server_id, exp_date, exp_date.strftime("%Y-%m-%d %H:%M:%S"), {"7": 100})
+
+
+def test_fresh_entry_far_from_expiry(config):
+    cache = ServerCache(config)
+    _put(cache, 1, days=30)
+    assert cache.get_fresh(1, threshold_days=3)["renew_prices"] == {"7": 100}
+
+
+def test_entry_near_threshold_is_refetched(config):
+    cache = ServerCache(config)
+    _put(cache, 1, days=2)
+    assert cache.get_fresh(1, threshold_days=3) is None
+
+
+def test_expired_ttl_is_refetched(config):
+    cache = ServerCache(config)
+    _put(cache, 1, days=30)
+    cache._entries["1"]["fetched_at"] = time.time() - 73 * 3600
+    assert cache.get_fresh(1, threshold_days=3) is None
+
+
+def test_save_and_reload_with_invalidate(config):
+    cache = ServerCache(config)
+    _put(cache, 1, days=30)
+    _put(cache, 2, days=30)
+    cache.save()
+    
+    cache = ServerCache(config)
+    assert cache.get_fresh(1, 3) is not None
+    cache.invalidate(1)
+    cache.save()
+    
+    cache = ServerCache(config)
+    assert cache.get_fresh(1, 3) is None
+    assert cache.get_fresh(2, 3) is not None
+
+
+def test_disabled_with_zero_ttl(config):
+    config["server_cache_ttl_hours"] = 0
+    cache = ServerCache(config)
+    _put(cache, 1, days=30)
+    assert cache.get_fresh(1, 3) is None
+
+
+@pytest.mark.parametrize("content", ["[]", "null", '"x"', '{"servers": []}', "{truncated"])
+def test_malformed_file_is_ignored(config, content):
+    with open(config["server_cache_path"], "w", encoding="utf-8") as f:
+        f.write(content)
+    cache = ServerCache(config)
+    assert cache.get_fresh(1, 3) is None
+
+
+@pytest.mark.parametrize("entry", [
+    [],
+    {"fetched_at": time.time()},
+    {"fetched_at": time.time(), "exp_ts": "soon", "exp_date": "x", "renew_prices": {}},
+    {"fetched_at": "now", "exp_ts": 0, "exp_date": "x", "renew_prices": {}},
+    {"fetched_at": time.time(), "exp_ts": time.time() + 86400 * 30, "exp_date": "x", "renew_prices": None},
+])
+def test_malformed_entry_is_a_miss(config, entry):
+    with open(config["server_cache_path"], "w", encoding="utf-8") as f:
+        json.dump({"servers": {"1": entry}}, f)
+    assert ServerCache(config).get_fresh(1, 3) is None
@@ -0,0 +1,127 @@
+import os
+
+import pytest
+from selenium.common import TimeoutException
+
+pytest.importorskip("cryptography")
+
+import session_store
+from session_store import SessionStore
+
+
+class _FakeDriver:
+    def __init__(self, landing_url):
+        self.landing_url = landing_url
+        self.current_url = "about:blank"
+        self.cdp = []
+    
+    def execute_cdp_cmd(self, cmd, params):
+        self.cdp.append(cmd)
+        if cmd == "Network.getAllCookies":
+            return {"cookies": [{"name": "sid", "value": "1", "domain": ".rainyun.com"}]}
+        return {}
+    
+    def execute_script(self, script):
+        return {"token": "t"}
+    
+    def get(self, url):
+        self.current_url = self.landing_url
+
+
+class _Wait:
+    timeout = False
+    
+    def __init__(self, driver, timeout):
+        pass
+    
+    def until(self, condition):
+        if _Wait.timeout:
+            raise TimeoutException()
+        return True
+
+
+@pytest.fixture
+def store(tmp_path, monkeypatch):
+    monkeypatch.setattr(session_store, "WebDriverWait", _Wait)
+    monkeypatch.setattr(SessionStore, "KDF_ITERATIONS", 1000)
+    _Wait.timeout = False
+    store = SessionStore({"session_dir": str(tmp_path)})
+    store.save(_FakeDriver(session_store.DASHBOARD_URL), "user", "pw")
+    assert os.path.exists(store._path("user"))
+    return store
+
+
+def test_restore_valid_session(store):
+    driver = _FakeDriver(session_store.DASHBOARD_URL)
+    assert store.restore(driver, "user", "pw") is True
+    assert "Network.clearBrowserCookies" not in driver.cdp
+
+
+def test_restore_login_page_clears_session(store):
+    driver = _FakeDriver(f"{session_store.APP_ORIGIN}/auth/login")
+    assert store.restore(driver, "user", "pw") is False
+    assert not os.path.exists(store._path("user"))
+    assert "Network.clearBrowserCookies" in driver.cdp
+
+
+def test_restore_timeout_keeps_session_file(store):
+    _Wait.timeout = True
+    driver = _FakeDriver(session_store.DASHBOARD_URL)
+    assert store.restore(driver, "user", "pw") is False
+    assert os.path.exists(store._path("user"))
+    assert "Network.clearBrowserCookies" in driver.cdp
+
+
+def test_wrong_password_ignores_session(store):
+    assert store.load_cookies("user", "other") is None
+    assert store.load_cookies("user", "pw") is None  # 无效会话已删除
+
+
+@pytest.mark.parametrize("content", [
+    "[]",
+    "null",
+    '"x"',
+    '{"salt": 1, "token": "x"}',
+    '{"salt": "AAAA"}',
+    "{truncated",
+    b"\xff\xfe\x00",
+])
+def test_malformed_session_file_is_miss_and_cleared(store, content):
+    path = store._path("user")
+    with open(path, "wb") as f:
+        f.write(content if isinstance(content, bytes) else content.encode("utf-8"))
+    
+    assert store.load_cookies("user", "pw") is None
+    assert not os.path.exists(path)
+
+
+@pytest.mark.parametrize("payload", [
+    [],
+    None,
+    "x",
+    {"version": SessionStore.SCHEMA_VERSION, "username": "user", "cookies": {"sid": "1"}},
+    {"version": SessionStore.SCHEMA_VERSION, "username": "user", "cookies": [], "local_storage": []},
+])
+def test_malformed_session_payload_is_miss_and_cleared(store, payload):
+    store._dump("user", "pw", payload)
+    
+    driver = _FakeDriver(session_store.DASHBOARD_URL)
+    assert store.restore(driver, "user", "pw") is False
+    assert not os.path.exists(store._path("user"))
+    assert driver.cdp == []
+
+
+def test_malformed_cookie_entries_are_skipped(store):
+    store._dump("user", "pw", {
+        "version": SessionStore.SCHEMA_VERSION,
+        "username": "user",
+        "cookies": ["sid", {"name": "sid", "value": "1"}, {"name": "x"}],
+    })
+    assert store.load_cookies("user", "pw") == {"sid": "1"}
+
+
+def test_unreadable_session_file_is_miss(store):
+    path = store._path("user")
+    os.remove(path)
+    os.mkdir(path)
+    assert store.load_cookies("user", "pw") is None